@@ -1,20 +1,91 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .routes import api
+from .routes.metrics import metrics
+from .redis import (
+    AdmissionController,
+    ResultWaiter,
+    TokenBucket,
+    close_async_pool,
+    get_async_client,
+    init_async_pool,
+    parse_lanes,
+)
+from .redis import codec
 from .utils.logging_config import setup_logging
 from .utils.config import Config
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Starts the result notification listener, the configured admission
+    control and, in model hosting mode, the classify micro-batcher;
+    releases the shared Redis pool on shutdown"""
+    redis = await get_async_client()
+    app.state.result_waiter = ResultWaiter(redis)
+    await app.state.result_waiter.start()
+
+    if Config.ADMISSION_HIGH_WATERMARK:
+        app.state.admission = AdmissionController(
+            redis,
+            Config.ADMISSION_HIGH_WATERMARK,
+            refresh_interval=Config.ADMISSION_REFRESH_SECONDS,
+            max_retry_after=Config.ADMISSION_MAX_RETRY_AFTER_SECONDS,
+            lanes=tuple(parse_lanes(Config.QUEUE_LANES))
+        )
+
+    if Config.RATE_LIMIT_PER_SECOND:
+        app.state.rate_limiter = TokenBucket(
+            redis, Config.RATE_LIMIT_PER_SECOND, Config.RATE_LIMIT_BURST
+        )
+
+    if Config.CLASSIFY_ENABLED:
+        # Imported here so API instances without model hosting never load torch
+        from .processor.microbatch import MicroBatcher
+
+        app.state.micro_batcher = MicroBatcher(
+            Config.MODEL_NAME,
+            device=Config.CLASSIFIER_DEVICE,
+            backend=Config.INFERENCE_BACKEND,
+            max_batch_size=Config.CLASSIFY_MAX_BATCH_SIZE,
+            max_wait_ms=Config.CLASSIFY_MAX_WAIT_MS,
+            max_pending=Config.CLASSIFY_MAX_PENDING,
+            max_length=Config.MAX_SEQ_LENGTH,
+            bucket_size=Config.INFERENCE_BUCKET_SIZE
+        )
+        await app.state.micro_batcher.start()
+
+    yield
+
+    if Config.CLASSIFY_ENABLED:
+        await app.state.micro_batcher.stop()
+
+    await app.state.result_waiter.stop()
+    await close_async_pool()
+
+
 def init() -> FastAPI:
     """Initializes FastAPI"""
     setup_logging(
         log_level=Config.LOG_LEVEL,
         log_dir=Config.LOG_DIR,
         enable_file_logging=Config.ENABLE_FILE_LOGGING,
-        enable_console_logging=Config.ENABLE_CONSOLE_LOGGING
+        enable_console_logging=Config.ENABLE_CONSOLE_LOGGING,
+        async_logging=Config.LOG_ASYNC,
+        json_format=Config.LOG_FORMAT == "json",
+        rate_limit=Config.LOG_RATE_LIMIT_PER_SECOND,
+        rate_limit_burst=Config.LOG_RATE_LIMIT_BURST,
+        queue_size=Config.LOG_QUEUE_SIZE
     )
+
+    # Fails at startup rather than on every enqueue when the codec is unusable
+    codec.encode({}, Config.QUEUE_CODEC)
+
+    init_async_pool(max_connections=Config.REDIS_MAX_CONNECTIONS)
     
-    app = FastAPI(title="Normie")
+    app = FastAPI(title="Normie", lifespan=lifespan)
 
     app.include_router(api, prefix="/api")
+    app.include_router(metrics)
 
     return app
@@ -0,0 +1,137 @@
+"""Adaptive batch sizing and worker scaling for the classifier consumer"""
+import math
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class Decision:
+    """Batch size and worker count chosen by the autoscaler"""
+    batch_size: int
+    workers: int
+    action: str
+    reason: str
+
+
+class Autoscaler:
+    """Chooses batch size and worker count from backlog and batch latency
+
+    Every ``interval`` seconds the consumer passes the input backlog
+    (``LLEN norm_queue_in`` or the stream group's lag and pending entries)
+    to ``decide``, together with the 95th percentile of the inference
+    latencies recorded since the previous decision:
+
+    - above ``target_latency_ms``: batches shrink, and a worker is added
+      when they are already at ``min_batch_size`` and a backlog remains
+    - backlog larger than one batch per worker, with latency headroom:
+      batches grow up to ``max_batch_size``, then a worker is added
+    - empty backlog: a worker is removed, then batches shrink, so sparse
+      traffic is not held back waiting for a full batch
+
+    Worker changes only move the consumer's inference concurrency, but an
+    added worker may first have to start and load the model, so they are
+    rate limited by ``worker_cooldown`` seconds to keep the count from
+    flapping.
+
+    Args:
+        min_batch_size: Smallest batch size
+        max_batch_size: Largest batch size
+        min_workers: Fewest worker processes
+        max_workers: Most worker processes; equal to ``min_workers`` keeps
+            the pool size fixed
+        target_latency_ms: Per-batch inference latency SLO
+        interval: Seconds between decisions
+        worker_cooldown: Minimum seconds between worker count changes
+    """
+    HEADROOM = 0.7
+
+    def __init__(
+        self,
+        min_batch_size: int = 1,
+        max_batch_size: int = 64,
+        min_workers: int = 1,
+        max_workers: int = 1,
+        target_latency_ms: float = 500,
+        interval: float = 5,
+        worker_cooldown: float = 60,
+    ) -> None:
+        if not 1 <= min_batch_size <= max_batch_size:
+            raise ValueError("Expected 1 <= min_batch_size <= max_batch_size")
+        if not 1 <= min_workers <= max_workers:
+            raise ValueError("Expected 1 <= min_workers <= max_workers")
+
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_latency = target_latency_ms / 1000
+        self.interval = interval
+        self.worker_cooldown = worker_cooldown
+        self._latencies: list[float] = []
+        self._last_worker_change = float("-inf")
+
+    def clamp_batch_size(self, batch_size: int) -> int:
+        return min(max(batch_size, self.min_batch_size), self.max_batch_size)
+
+    def clamp_workers(self, workers: int) -> int:
+        return min(max(workers, self.min_workers), self.max_workers)
+
+    def record(self, seconds: float) -> None:
+        """Records the inference latency of one batch"""
+        self._latencies.append(seconds)
+
+    def latency(self) -> float | None:
+        """95th percentile of the latencies recorded since the last decision"""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def decide(self, backlog: int, batch_size: int, workers: int) -> Decision:
+        """Chooses the next batch size and worker count
+
+        Args:
+            backlog: Messages waiting on the input transport
+            batch_size: Current batch size
+            workers: Current worker count
+
+        Returns:
+            Decision: Unchanged values with action ``"hold"`` when nothing
+            needs to change
+        """
+        latency = self.latency()
+        self._latencies.clear()
+
+        can_change_workers = time.monotonic() - self._last_worker_change >= self.worker_cooldown
+        capacity = batch_size * workers
+
+        if latency is not None and latency > self.target_latency:
+            reason = f"p95 batch latency {latency * 1000:.0f} ms above {self.target_latency * 1000:.0f} ms"
+            if batch_size > self.min_batch_size:
+                return Decision(max(self.min_batch_size, batch_size * 3 // 4), workers, "shrink_batch", reason)
+            if backlog > capacity and workers < self.max_workers and can_change_workers:
+                return self._workers(batch_size, workers + 1, "add_worker", reason)
+
+        elif backlog > capacity:
+            if latency is None or latency < self.target_latency * self.HEADROOM:
+                reason = f"backlog {backlog} above {capacity} in flight"
+                if batch_size < self.max_batch_size:
+                    return Decision(
+                        min(self.max_batch_size, math.ceil(batch_size * 1.5)), workers, "grow_batch", reason
+                    )
+                if workers < self.max_workers and can_change_workers:
+                    return self._workers(batch_size, workers + 1, "add_worker", reason)
+
+        elif backlog == 0:
+            if workers > self.min_workers and can_change_workers:
+                return self._workers(batch_size, workers - 1, "remove_worker", "input queue empty")
+            if batch_size > self.min_batch_size:
+                return Decision(
+                    max(self.min_batch_size, batch_size // 2), workers, "shrink_batch", "input queue empty"
+                )
+
+        return Decision(batch_size, workers, "hold", "within bounds")
+
+    def _workers(self, batch_size, workers, action, reason):
+        self._last_worker_change = time.monotonic()
+        return Decision(batch_size, workers, action, reason)
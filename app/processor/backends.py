@@ -0,0 +1,180 @@
+"""Inference backends for the text classifier
+
+``torch`` is the eager fp32 pipeline, ``int8`` applies PyTorch dynamic
+quantization to its linear layers and ``onnx`` runs an exported ONNX
+Runtime graph (requires the ``onnx`` extra). Quantized and exported
+artifacts are cached under ``BACKEND_CACHE_DIR`` so only the first start
+pays for them.
+
+Run ``python -m app.processor.backends <backend>`` to compare a backend
+against the fp32 model on ``tests/test_phrases.json``.
+"""
+import argparse
+import json
+import os
+from dataclasses import dataclass
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer, pipeline
+from .inference import DEFAULT_MAX_LENGTH, classify_texts
+from ..utils import Config
+from ..utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+@dataclass
+class LoadedClassifier:
+    """Minimal classifier interface used by ``classify_texts``"""
+    tokenizer: object
+    model: object
+    device: torch.device
+
+
+def artifact_dir(model_name, backend, cache_dir=None):
+    """Directory holding the cached artifact of a backend"""
+    return os.path.join(
+        cache_dir or Config.BACKEND_CACHE_DIR,
+        model_name.replace("/", "--"),
+        backend
+    )
+
+
+def load_classifier(model_name, device="cpu", backend="torch", cache_dir=None, threads=None):
+    """Loads a classifier for the given backend
+
+    Args:
+        model_name: Hugging Face model identifier
+        device: Device for the ``torch`` backend; ``int8`` and ``onnx`` run on CPU
+        backend: One of ``BACKENDS``
+        cache_dir: Root of the artifact cache, defaults to ``BACKEND_CACHE_DIR``
+        threads: Intra-op threads of the ONNX Runtime session, which does
+            not follow torch's setting; all cores by default
+
+    Returns:
+        Object exposing ``tokenizer``, ``model`` and ``device``
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+
+    if backend == "torch":
+        return pipeline("text-classification", model=model_name, device=device)
+
+    path = artifact_dir(model_name, backend, cache_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if backend == "int8":
+        return LoadedClassifier(tokenizer, _load_int8(model_name, path), torch.device("cpu"))
+
+    return LoadedClassifier(tokenizer, _load_onnx(model_name, path, threads), torch.device("cpu"))
+
+
+def _load_int8(model_name, path):
+    state_file = os.path.join(path, "model_state.pt")
+
+    if os.path.exists(state_file):
+        logger.info("Loading cached int8 weights from %s", state_file)
+        # Only tensors are cached, so the quantized architecture is rebuilt
+        # from the model config and the file is loaded without unpickling code
+        model = _quantize(AutoModelForSequenceClassification.from_config(AutoConfig.from_pretrained(model_name)))
+        model.load_state_dict(torch.load(state_file, weights_only=True))
+        return model
+
+    logger.info("Quantizing %s to int8", model_name)
+    model = _quantize(AutoModelForSequenceClassification.from_pretrained(model_name))
+
+    os.makedirs(path, exist_ok=True)
+    torch.save(model.state_dict(), state_file)
+    return model
+
+
+def _quantize(model):
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name, path, threads=None):
+    try:
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError as e:
+        raise RuntimeError(
+            "The onnx backend requires optional dependencies: pip install 'normie[onnx]'"
+        ) from e
+
+    session_options = None
+    if threads:
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+
+    if os.path.exists(os.path.join(path, "model.onnx")):
+        logger.info("Loading cached ONNX model from %s", path)
+        return ORTModelForSequenceClassification.from_pretrained(path, session_options=session_options)
+
+    logger.info("Exporting %s to ONNX", model_name)
+    model = ORTModelForSequenceClassification.from_pretrained(
+        model_name, export=True, session_options=session_options
+    )
+    model.save_pretrained(path)
+    return model
+
+
+def load_phrases(path):
+    """Flattens the categorised phrases of ``tests/test_phrases.json``"""
+    with open(path, encoding="utf-8") as phrases_file:
+        data = json.load(phrases_file)
+
+    return [phrase for phrases in data.values() for phrase in phrases]
+
+
+def check_agreement(model_name, backend, texts, max_length=DEFAULT_MAX_LENGTH, cache_dir=None):
+    """Compares a backend with the fp32 ``torch`` backend
+
+    Returns:
+        dict: Agreement rate on labels and the largest score difference
+    """
+    reference = classify_texts(
+        load_classifier(model_name, "cpu", "torch"), texts, max_length=max_length
+    )
+    candidate = classify_texts(
+        load_classifier(model_name, "cpu", backend, cache_dir), texts, max_length=max_length
+    )
+
+    pairs = [
+        (ref, cand) for ref, cand in zip(reference, candidate)
+        if not isinstance(ref, Exception) and not isinstance(cand, Exception)
+    ]
+    agreed = sum(ref["label"] == cand["label"] for ref, cand in pairs)
+
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "compared": len(pairs),
+        "agreement": agreed / len(pairs) if pairs else 0.0,
+        "max_score_diff": max((abs(ref["score"] - cand["score"]) for ref, cand in pairs), default=0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare an inference backend with fp32")
+    parser.add_argument("backend", choices=BACKENDS)
+    parser.add_argument("--model", default=os.getenv("MODEL_NAME", "ruanchaves/bert-base-portuguese-cased-hatebr"))
+    parser.add_argument("--phrases", default=os.path.join(Config.PROJECT_ROOT, "tests", "test_phrases.json"))
+    parser.add_argument("--normalise", action="store_true", help="Normalise phrases with Enelvo first")
+    args = parser.parse_args()
+
+    texts = load_phrases(args.phrases)
+
+    if args.normalise:
+        from .normaliser import normalise_texts
+        texts = normalise_texts(texts)
+        failed = [text for text in texts if isinstance(text, Exception)]
+        if failed:
+            raise SystemExit(f"Failed to normalise {len(failed)} phrases: {failed[0]}")
+
+    print(json.dumps(check_agreement(args.model, args.backend, texts), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Bulk classification of large files, bypassing Redis
+
+Streams a JSONL, CSV or Parquet file in chunks through a process pool
+running ``_classify_batch_worker`` and writes one result per input row,
+in input order, to a JSONL or CSV file. At most ``max_inflight`` batches
+are in the pool at once, so memory stays bounded by the chunk size and
+the in-flight batches rather than the file size.
+
+Progress is checkpointed to ``<output>.ckpt`` as the number of input rows
+whose results were written and the output size at that point; a rerun
+with the same arguments truncates the output to that size and skips the
+rows already done. The checkpoint is removed once the file is complete.
+"""
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from . import classifier as worker
+from .inference import DEFAULT_BUCKET_SIZE, DEFAULT_MAX_LENGTH
+from ..utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INPUT_FORMATS = ("jsonl", "csv", "parquet")
+OUTPUT_FORMATS = ("jsonl", "csv")
+OUTPUT_FIELDS = ("id", "status", "label", "score", "error", "error_type", "classified_at")
+
+
+def detect_format(path, formats):
+    """Infers a file format from its extension"""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    extension = {"ndjson": "jsonl", "json": "jsonl", "pq": "parquet"}.get(extension, extension)
+
+    if extension not in formats:
+        raise ValueError(f"Cannot infer the format of {path}, expected one of {formats}")
+
+    return extension
+
+
+def read_chunks(path, file_format, chunk_size, columns):
+    """Yields DataFrames of at most ``chunk_size`` rows holding ``columns``"""
+    if file_format == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns, dtype=str, keep_default_na=False)
+
+    elif file_format == "jsonl":
+        for chunk in pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False):
+            yield chunk[columns]
+
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Reading Parquet files requires pyarrow: pip install pyarrow") from e
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+
+    else:
+        raise ValueError(f"Unknown input format {file_format!r}, expected one of {INPUT_FORMATS}")
+
+
+def _skip_rows(chunks, rows):
+    for chunk in chunks:
+        if rows >= len(chunk):
+            rows -= len(chunk)
+            continue
+
+        yield chunk.iloc[rows:]
+        rows = 0
+
+
+def _load_checkpoint(path, input_path):
+    if not os.path.exists(path):
+        return None
+
+    with open(path, encoding="utf-8") as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+
+    if checkpoint.get("input") != os.path.abspath(input_path):
+        raise ValueError(f"Checkpoint {path} belongs to {checkpoint.get('input')}, not {input_path}")
+
+    return checkpoint
+
+
+def _save_checkpoint(path, input_path, rows, output_file):
+    output_file.flush()
+    os.fsync(output_file.fileno())
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as checkpoint_file:
+        json.dump({
+            "input": os.path.abspath(input_path),
+            "rows": rows,
+            "bytes": os.fstat(output_file.fileno()).st_size,
+        }, checkpoint_file)
+    os.replace(temporary, path)
+
+
+def _create_pool(workers, model_name, device, max_length, backend, share_weights):
+    """Process pool mirroring ``BERTClassifier._create_executor``"""
+    initargs = (model_name, device, max_length, 0, 0, backend)
+
+    if share_weights:
+        worker._load_shared_model(model_name, device, backend)
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=worker._init_worker,
+            initargs=initargs,
+        )
+
+    return ProcessPoolExecutor(max_workers=workers, initializer=worker._init_worker, initargs=initargs)
+
+
+def classify_file(
+    input_path,
+    output_path,
+    text_column="msg",
+    id_column=None,
+    input_format=None,
+    output_format=None,
+    chunk_size=10_000,
+    batch_size=64,
+    workers=2,
+    model_name="ruanchaves/bert-base-portuguese-cased-hatebr",
+    device="cpu",
+    backend="torch",
+    max_length=DEFAULT_MAX_LENGTH,
+    bucket_size=DEFAULT_BUCKET_SIZE,
+    share_weights=False,
+    checkpoint_every=None,
+):
+    """Classifies every row of ``input_path`` into ``output_path``
+
+    Args:
+        input_path: JSONL, CSV or Parquet file
+        output_path: JSONL or CSV file, one result per input row
+        text_column: Column holding the text to classify
+        id_column: Column copied to the ``id`` of each result, defaults
+            to the row number
+        input_format: One of ``INPUT_FORMATS``, inferred from the extension by default
+        output_format: One of ``OUTPUT_FORMATS``, inferred from the extension by default
+        chunk_size: Rows read from the input at a time
+        batch_size: Rows per worker batch
+        workers: Worker processes
+        model_name: Hugging Face model identifier
+        device: Device the model runs on
+        backend: Inference backend, see ``backends.BACKENDS``
+        max_length: Token limit, longer texts are truncated
+        bucket_size: Maximum number of texts per padded forward pass
+        share_weights: Fork workers from a process holding the model, see
+            ``BERTClassifier``
+        checkpoint_every: Rows between checkpoints, defaults to ``chunk_size``
+
+    Returns:
+        int: Rows classified by this run
+    """
+    input_format = input_format or detect_format(input_path, INPUT_FORMATS)
+    output_format = output_format or detect_format(output_path, OUTPUT_FORMATS)
+    checkpoint_every = checkpoint_every or chunk_size
+    checkpoint_path = f"{output_path}.ckpt"
+    columns = [text_column] + ([id_column] if id_column and id_column != text_column else [])
+
+    checkpoint = _load_checkpoint(checkpoint_path, input_path)
+    done = checkpoint["rows"] if checkpoint else 0
+
+    if checkpoint:
+        logger.info("Resuming %s after %d rows", input_path, done)
+        with open(output_path, "r+b") as output_file:
+            output_file.truncate(checkpoint["bytes"])
+
+    output_file = open(output_path, "a" if checkpoint else "w", encoding="utf-8", newline="")
+    csv_writer = None
+
+    if output_format == "csv":
+        csv_writer = csv.DictWriter(output_file, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+        if not checkpoint:
+            csv_writer.writeheader()
+
+    def write(results):
+        for result in results:
+            record = {"id": result.get("id"), **worker._result_record(result)}
+            if csv_writer:
+                csv_writer.writerow(record)
+            else:
+                output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    max_inflight = workers * 2
+    pending = deque()
+    written = done
+    last_checkpoint = done
+    started = time.perf_counter()
+    pool = _create_pool(workers, model_name, device, max_length, backend, share_weights)
+
+    # False while a batch is half written, when the output cannot be checkpointed
+    consistent = True
+
+    def write_head():
+        """Writes the oldest batch, checkpointing every ``checkpoint_every`` rows"""
+        nonlocal written, last_checkpoint, consistent
+        size, future = pending.popleft()
+        results = future.result()
+
+        consistent = False
+        write(results)
+        written += size
+        consistent = True
+
+        if written - last_checkpoint >= checkpoint_every:
+            _save_checkpoint(checkpoint_path, input_path, written, output_file)
+            last_checkpoint = written
+
+    try:
+        row = done
+        chunks = _skip_rows(read_chunks(input_path, input_format, chunk_size, columns), done)
+
+        for chunk in chunks:
+            texts = chunk[text_column].tolist()
+            ids = chunk[id_column].tolist() if id_column else range(row, row + len(texts))
+            messages = [
+                {"id": msg_id, "msg": text if isinstance(text, str) else ""}
+                for msg_id, text in zip(ids, texts)
+            ]
+            row += len(messages)
+
+            for start in range(0, len(messages), batch_size):
+                batch = messages[start:start + batch_size]
+                pending.append((len(batch), pool.submit(
+                    worker._classify_batch_worker,
+                    batch, model_name, device, max_length, bucket_size, None, backend
+                )))
+
+                while len(pending) >= max_inflight:
+                    write_head()
+
+            logger.info(
+                "Classified %d rows (%.0f rows/s)",
+                written, (written - done) / (time.perf_counter() - started)
+            )
+
+        while pending:
+            write_head()
+    except BaseException:
+        pool.shutdown(cancel_futures=True)
+        if consistent:
+            _save_checkpoint(checkpoint_path, input_path, written, output_file)
+            last_checkpoint = written
+        output_file.close()
+        logger.warning("Stopped, rerun to resume after %d rows from %s", last_checkpoint, checkpoint_path)
+        raise
+
+    pool.shutdown()
+    output_file.close()
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    logger.info("Classified %d rows into %s", written - done, output_path)
+    return written - done
@@ -0,0 +1,162 @@
+"""Classification cache keyed on the normalised text"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from redis import Redis, RedisError
+from ..utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_KEY_PREFIX = "cls_cache:"
+CACHE_STATS_KEY = "cls_cache_stats"
+
+
+class ClassificationCache:
+    """Two tier cache of classifications: an in-process LRU backed by
+    a shared Redis tier whose entries expire after ``ttl`` seconds
+
+    Keys hash the model name together with the normalised text, so a
+    model change never serves stale classifications. Redis failures are
+    logged and treated as misses.
+
+    Hit and miss counters are kept three ways: running totals in
+    ``stats``, counts since the last ``take_counts`` for the consumer's
+    Prometheus counters, and counts not yet added to the shared
+    ``cls_cache_stats`` hash, flushed by ``flush_stats`` at most every
+    ``stats_interval`` seconds.
+    """
+    def __init__(
+        self,
+        model_name,
+        max_size=10_000,
+        ttl=86_400,
+        redis_client: Redis | None = None,
+        stats_interval=5.0
+    ):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_client = redis_client
+        self.stats_interval = stats_interval
+
+        self._entries = OrderedDict()
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+        self._pending_stats = dict.fromkeys(self.stats, 0)
+        self._unreported = dict.fromkeys(self.stats, 0)
+        self._last_flush = time.monotonic()
+
+    def key(self, text):
+        digest = hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+        return f"{CACHE_KEY_PREFIX}{digest}"
+
+    def get_many(self, keys):
+        """Looks keys up in the local LRU, then the misses in Redis with one MGET
+
+        Redis values that are not a JSON object count as misses.
+
+        Returns:
+            dict: Mapping of found keys to their classification
+        """
+        found = {}
+        missing = []
+
+        for key in keys:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                found[key] = self._entries[key]
+            else:
+                missing.append(key)
+
+        self._count("local_hits", len(found))
+
+        if missing and self.redis_client is not None:
+            try:
+                values = self.redis_client.mget(missing)
+            except RedisError as e:
+                logger.warning("Classification cache lookup failed: %s", e)
+                values = [None] * len(missing)
+
+            redis_hits = 0
+            for key, value in zip(missing, values):
+                if value is None:
+                    continue
+                try:
+                    classification = json.loads(value)
+                except (TypeError, ValueError) as e:
+                    classification = e
+                if not isinstance(classification, dict):
+                    # Corrupt or foreign value, classified again and overwritten
+                    logger.warning("Ignoring unreadable cache entry %s: %r", key, classification)
+                    continue
+                found[key] = classification
+                self._remember(key, classification)
+                redis_hits += 1
+
+            self._count("redis_hits", redis_hits)
+
+        self._count("misses", len(keys) - len(found))
+
+        return found
+
+    def put_many(self, entries):
+        """Stores fresh classifications in both tiers, flushing pending
+        hit/miss counters to ``cls_cache_stats`` in the same round trip"""
+        for key, classification in entries.items():
+            self._remember(key, classification)
+
+        if self.redis_client is None:
+            return
+
+        try:
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, classification in entries.items():
+                    pipe.set(key, json.dumps(classification), ex=self.ttl)
+                for field, count in self._pending_stats.items():
+                    if count:
+                        pipe.hincrby(CACHE_STATS_KEY, field, count)
+                pipe.execute()
+            self._pending_stats = dict.fromkeys(self.stats, 0)
+            self._last_flush = time.monotonic()
+        except RedisError as e:
+            logger.warning("Classification cache write failed: %s", e)
+
+    def flush_stats(self, force=False):
+        """Adds pending hit/miss counters to ``cls_cache_stats``, unless
+        they were flushed less than ``stats_interval`` seconds ago"""
+        if self.redis_client is None or not any(self._pending_stats.values()):
+            return
+        if not force and time.monotonic() - self._last_flush < self.stats_interval:
+            return
+
+        try:
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                for field, count in self._pending_stats.items():
+                    if count:
+                        pipe.hincrby(CACHE_STATS_KEY, field, count)
+                pipe.execute()
+            self._pending_stats = dict.fromkeys(self.stats, 0)
+        except RedisError as e:
+            logger.warning("Classification cache stats flush failed: %s", e)
+        finally:
+            self._last_flush = time.monotonic()
+
+    def take_counts(self):
+        """Returns the hit/miss counts since the previous call
+
+        Returns:
+            dict: Mapping of ``stats`` field to count
+        """
+        counts, self._unreported = self._unreported, dict.fromkeys(self.stats, 0)
+        return counts
+
+    def _remember(self, key, classification):
+        self._entries[key] = classification
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _count(self, field, count):
+        self.stats[field] += count
+        self._pending_stats[field] += count
+        self._unreported[field] += count
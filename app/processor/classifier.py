@@ -1,91 +1,519 @@
 import asyncio
+import gc
 import json
+import multiprocessing
+import os
+import sys
+import socket
+import time
 from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from datetime import datetime
-from redis import RedisError
-from transformers import pipeline
-from .normaliser import normaliser
-from ..redis import get_async_client
+from redis import RedisError, ResponseError
+from .backends import load_classifier
+from .cache import ClassificationCache
+from .inference import DEFAULT_BUCKET_SIZE, DEFAULT_MAX_LENGTH, classify_texts
+from .normaliser import message_texts, normalise_texts
+from .scheduling import LaneScheduler
+from .topology import apply_layout, claim_slot, plan_layout
+from ..redis import codec
+from ..redis import (
+    DEFAULT_LANE,
+    INPUT_QUEUE,
+    INPUT_STREAM,
+    MSG_INDEX,
+    RESULT_CHANNEL,
+    RESULT_STREAM,
+    STREAM_GROUP,
+    STREAM_PAYLOAD_FIELD,
+    CodecError,
+    get_async_binary_client,
+    get_async_client,
+    get_client,
+    lane_depths,
+    lane_key,
+    queue_depths,
+    result_key,
+)
 from ..utils.logging_config import get_logger
+from ..utils.metrics import (
+    ACTIVE_WORKERS,
+    AUTOSCALE_DECISIONS,
+    BATCH_SIZE,
+    BATCH_SIZE_TARGET,
+    CACHE_LOOKUPS,
+    CLASSIFIED_MESSAGES,
+    END_TO_END_LATENCY,
+    LANE_DEPTH,
+    LANE_MESSAGES,
+    QUEUE_DEPTH,
+    STAGE_LATENCY,
+)
 
 logger = get_logger(__name__)
 
 
-def _classify_batch_worker(batch, model_name, device):
+_worker_classifier = None
+_worker_batches = 0
+_worker_baseline_rss_mb = None
+_worker_init_error = None
+_worker_cache = None
+
+_WARMUP_TEXT = "aquecimento do modelo"
+
+# Marks the end of the stream between consumer stages
+_STOP = object()
+
+# Payloads are read as bytes, whatever their codec
+_PAYLOAD_FIELD = STREAM_PAYLOAD_FIELD.encode()
+
+# Label children bound once so the hot loop skips label lookups
+_STAGE_TIMERS = {
+    stage: STAGE_LATENCY.labels(stage=stage)
+    for stage in ("fetch", "normalise", "tokenise", "forward", "publish")
+}
+_CACHE_LOOKUPS = {
+    "local_hits": CACHE_LOOKUPS.labels(result="local_hit"),
+    "redis_hits": CACHE_LOOKUPS.labels(result="redis_hit"),
+    "misses": CACHE_LOOKUPS.labels(result="miss"),
+}
+_CLASSIFIED = CLASSIFIED_MESSAGES.labels(status="classified")
+_ERRORED = CLASSIFIED_MESSAGES.labels(status="error")
+
+
+@dataclass(eq=False)
+class _Batch:
+    """A batch moving through the consumer stages"""
+    messages: list = field(default_factory=list)
+    entries: list = field(default_factory=list)
+    payloads: list = field(default_factory=list)
+    texts: list | None = None
+    normalised: bool = False
+    results: list | None = None
+
+    @property
+    def acks(self):
+        """Stream entry ids to acknowledge by stream, empty on the list transport"""
+        return _group_acks(self.entries)
+
+
+def _group_acks(entries):
+    """Groups ``(stream, entry_id)`` pairs by stream, skipping ``None``"""
+    acks = {}
+    for entry in entries:
+        if entry is not None:
+            stream, entry_id = entry
+            acks.setdefault(stream, []).append(entry_id)
+    return acks
+
+
+async def _finish(pop, collect):
+    """Awaits a Redis pop and passes its reply to ``collect``, even when
+    the task is cancelled while the pop is in flight
+
+    Redis has already removed the messages a pop returns, so dropping its
+    reply would lose them. On cancellation the pop is waited for, its
+    reply collected, and the cancellation raised again.
+
+    Returns:
+        The return value of ``collect``
+    """
+    task = asyncio.ensure_future(pop)
+    try:
+        reply = await asyncio.shield(task)
+    except asyncio.CancelledError:
+        collect(await task)
+        raise
+    return collect(reply)
+
+
+def _current_rss_mb():
+    """Returns the resident set size of the current process in MB"""
     try:
-        classifier = pipeline(
-            "text-classification",
-            model=model_name,
-            device=device,
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        import resource
+        # ru_maxrss is the peak RSS in KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _init_worker(
+    model_name,
+    device,
+    max_length=DEFAULT_MAX_LENGTH,
+    cache_size=0,
+    cache_ttl=0,
+    backend="torch",
+    layout=None,
+    slots=None
+):
+    """Process pool initializer: loads the model once and keeps it resident
+
+    A worker forked from a parent that already holds the model (see
+    ``_load_shared_model``) reuses it and only runs the warm-up pass.
+
+    Args:
+        model_name: Hugging Face model identifier
+        device: Device the pipeline runs on
+        max_length: Token limit used for the warm-up pass
+        cache_size: Entries of the in-process classification cache, 0 disables caching
+        cache_ttl: Seconds classifications live in the shared Redis cache tier,
+            0 keeps the cache in-process only
+        backend: Inference backend, see ``backends.BACKENDS``
+        layout: ``topology.WorkerLayout`` applied before the model runs,
+            ``None`` leaves the thread counts to the libraries
+        slots: Shared array of worker pids, one per core set of the layout
+    """
+    global _worker_classifier, _worker_batches, _worker_baseline_rss_mb, _worker_init_error
+    global _worker_cache
+
+    if layout is not None:
+        core_set = apply_layout(layout, claim_slot(slots) if slots is not None else 0)
+        logger.info(
+            "Worker %d using %d threads%s", os.getpid(), layout.threads,
+            f" on CPUs {sorted(core_set)}" if core_set else ""
+        )
+
+    if cache_size:
+        # Backends may disagree slightly, so they never share cache entries
+        _worker_cache = ClassificationCache(
+            f"{model_name}:{backend}",
+            max_size=cache_size,
+            ttl=cache_ttl,
+            redis_client=get_client() if cache_ttl else None
         )
+
+    try:
+        if _worker_classifier is None:
+            _worker_classifier = load_classifier(
+                model_name, device, backend, threads=layout.threads if layout else None
+            )
+        # Dummy forward pass so the first real batch does not pay lazy init costs
+        warmup = classify_texts(_worker_classifier, [_WARMUP_TEXT], max_length=max_length)[0]
+        if isinstance(warmup, Exception):
+            raise warmup
     except Exception as e:
         logger.error("Failed to initialize classifier pipeline: %s", e)
-        current_time = datetime.now().isoformat()
-        return [{
-            **message,
-            "error": f"Model initialization failed: {str(e)}",
-            "error_type": "ModelInitializationError",
-            "classified_at": current_time,
-            "status": "error"
-        } for message in batch]
-    
-    results = []
+        _worker_classifier = None
+        _worker_init_error = str(e)
+        return
+
+    _worker_init_error = None
+    _worker_batches = 0
+    _worker_baseline_rss_mb = _current_rss_mb()
+    logger.info(
+        "Worker %d loaded %s with %s backend (RSS %.0f MB)",
+        os.getpid(), model_name, backend, _worker_baseline_rss_mb
+    )
+
+
+def _load_shared_model(model_name, device, backend):
+    """Loads the model in the consumer process so forked workers share it
+
+    Forked workers inherit the weights copy-on-write, and inference only
+    reads them, so the pages stay shared: each extra worker costs its
+    activations instead of another copy of the model. No forward pass runs
+    here, since thread pools started before ``fork`` do not survive in the
+    children; ``_init_worker`` warms each worker up instead.
+    """
+    global _worker_classifier
+
+    # Forked workers must not start tokenizer threads inherited from the parent
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    _worker_classifier = load_classifier(model_name, device, backend)
+
+    # Moves everything allocated so far out of the collector's reach, so
+    # collections in the workers do not write to (and copy) shared pages
+    gc.freeze()
+    logger.info("Loaded %s with %s backend for shared workers (RSS %.0f MB)",
+                model_name, backend, _current_rss_mb())
+
+
+def _classify_batch_task(
+    texts,
+    ids,
+    model_name,
+    device,
+    max_length=DEFAULT_MAX_LENGTH,
+    bucket_size=DEFAULT_BUCKET_SIZE,
+    max_rss_growth_mb=None,
+    normalised=False,
+    backend="torch"
+):
+    """Executor entry point: classifies a batch of texts and reports whether
+    the worker should be recycled, along with the seconds spent in each
+    worker stage and the worker's cache lookups since its previous batch
+
+    Only the texts and message ids cross the process boundary, and only
+    the classifications come back; the consumer merges them into the
+    messages with ``_merge_outcomes``.
+
+    Returns:
+        tuple: (outcomes, needs_recycle, timings, cache_counts), see
+        ``_classify_texts`` and ``ClassificationCache.take_counts``
+    """
+    global _worker_batches
+
+    timings = {}
+    outcomes = _classify_texts(
+        texts, ids, model_name, device, max_length, bucket_size, normalised, backend, timings
+    )
+    _worker_batches += 1
+
+    cache_counts = {}
+    if _worker_cache:
+        _worker_cache.flush_stats()
+        cache_counts = _worker_cache.take_counts()
+
+    needs_recycle = False
+    if max_rss_growth_mb and _worker_baseline_rss_mb is not None:
+        growth = _current_rss_mb() - _worker_baseline_rss_mb
+        if growth > max_rss_growth_mb:
+            logger.warning(
+                "Worker %d RSS grew %.0f MB after %d batches, requesting recycle",
+                os.getpid(), growth, _worker_batches
+            )
+            needs_recycle = True
+
+    return outcomes, needs_recycle, timings, cache_counts
+
+
+def _classify_batch_worker(
+    batch,
+    model_name,
+    device,
+    max_length=DEFAULT_MAX_LENGTH,
+    bucket_size=DEFAULT_BUCKET_SIZE,
+    prepared=None,
+    backend="torch",
+    timings=None
+):
+    """Classifies a batch of queue messages
+
+    Args:
+        prepared: ``normalise_texts(message_texts(batch))`` output when
+            normalisation already ran in a separate stage
+        timings: Optional dict accumulating seconds spent normalising,
+            tokenising and in forward passes
+
+    Returns:
+        list: Result or error payload per message, in input order
+    """
+    texts = message_texts(batch) if prepared is None else prepared
+    valid = _valid_indexes(texts)
+    outcomes = _classify_texts(
+        [texts[index] for index in valid],
+        [_message_id(batch[index]) for index in valid],
+        model_name,
+        device,
+        max_length,
+        bucket_size,
+        prepared is not None,
+        backend,
+        timings
+    )
+    return _merge_outcomes(batch, texts, valid, outcomes)
+
+
+def _classify_texts(
+    texts,
+    ids,
+    model_name,
+    device,
+    max_length=DEFAULT_MAX_LENGTH,
+    bucket_size=DEFAULT_BUCKET_SIZE,
+    normalised=False,
+    backend="torch",
+    timings=None
+):
+    """Normalises, unless ``normalised``, and classifies texts
+
+    Args:
+        ids: Message id per text, for logging failures
+        timings: Optional dict accumulating seconds spent normalising,
+            tokenising and in forward passes
+
+    Returns:
+        list: Classification dict, or ``(error, error_type)`` pair, per
+        text in input order
+    """
+    if _worker_classifier is None:
+        _init_worker(model_name, device, max_length, backend=backend)
+
+    classifier = _worker_classifier
+
+    if classifier is None:
+        failure = (f"Model initialization failed: {_worker_init_error}", "ModelInitializationError")
+        return [failure] * len(texts)
+
+    if not normalised:
+        started = time.perf_counter()
+        texts = normalise_texts(texts)
+        if timings is not None:
+            timings["normalise"] = time.perf_counter() - started
+
+    outcomes = [None] * len(texts)
+    valid = []
+
+    for index, text in enumerate(texts):
+        if isinstance(text, Exception):
+            outcomes[index] = _error_fields(ids[index], text)
+        else:
+            valid.append((index, text))
+
+    classifications = _classify_unique(
+        classifier,
+        [text for _, text in valid],
+        max_length,
+        bucket_size,
+        timings
+    )
+
+    for (index, _), classification in zip(valid, classifications):
+        if isinstance(classification, Exception):
+            outcomes[index] = _error_fields(ids[index], classification)
+        else:
+            outcomes[index] = classification
+
+    return outcomes
+
+
+def _valid_indexes(texts):
+    return [index for index, text in enumerate(texts) if not isinstance(text, Exception)]
+
+
+def _message_id(message):
+    return message.get("id", "unknown") if isinstance(message, dict) else "unknown"
+
+
+def _merge_outcomes(batch, texts, valid, outcomes):
+    """Builds the result payload of every message of a batch
+
+    Args:
+        batch: Queue messages
+        texts: ``message_texts`` output, normalised or not, for
+            the batch; its exceptions become error results
+        valid: Indexes of the messages sent for classification
+        outcomes: ``_classify_texts`` output for those messages
+
+    Returns:
+        list: Result or error payload per message, in input order
+    """
     current_time = datetime.now().isoformat()
-    
-    for message in batch:
-        try:
-            if not isinstance(message, dict):
-                raise ValueError(f"Invalid message format: expected dict, got {type(message).__name__}")
-            
-            text = message.get("msg", "")
-            
-            if not text or not text.strip():
-                raise ValueError("Empty or missing 'msg' field in message")
-            
-            normalized_text = normaliser.normalise(text)
-            classification = classifier(normalized_text)[0]
-            
-            result_message = {
-                **message,
+    results = [None] * len(batch)
+
+    for index, text in enumerate(texts):
+        if isinstance(text, Exception):
+            results[index] = _error_result(batch[index], text, current_time)
+
+    for index, outcome in zip(valid, outcomes):
+        if isinstance(outcome, dict):
+            results[index] = {
+                **batch[index],
                 "classified_at": current_time,
-                "classification": classification,
+                "classification": outcome,
                 "status": "classified"
             }
-            results.append(result_message)
-            
-        except ValueError as e:
-            logger.warning("Validation error for message %s: %s", message.get('id', 'unknown'), e)
-            error_message = {
-                **message,
-                "error": str(e),
-                "error_type": "ValidationError",
-                "classified_at": current_time,
-                "status": "error"
-            }
-            results.append(error_message)
-        except RuntimeError as e:
-            logger.error("Processing error for message %s: %s", message.get('id', 'unknown'), e)
-            error_message = {
-                **message,
-                "error": str(e),
-                "error_type": "ProcessingError",
+        else:
+            error_text, error_type = outcome
+            results[index] = {
+                **batch[index],
+                "error": error_text,
+                "error_type": error_type,
                 "classified_at": current_time,
                 "status": "error"
             }
-            results.append(error_message)
-        except Exception as e:
-            logger.exception("Unexpected error for message %s: %s", message.get('id', 'unknown'), e)
-            error_message = {
-                **message,
-                "error": f"Unexpected error: {str(e)}",
-                "error_type": "UnexpectedError",
-                "classified_at": current_time,
-                "status": "error"
-            }
-            results.append(error_message)
 
     return results
 
+
+def _classify_unique(classifier, texts, max_length, bucket_size, timings=None):
+    """Classifies normalised texts, running inference once per distinct
+    text and skipping texts already held by the worker cache
+
+    Returns:
+        list: Classification dict or exception per text, in input order
+    """
+    keys = [_worker_cache.key(text) for text in texts] if _worker_cache else list(texts)
+    unique = dict(zip(keys, texts))
+
+    known = _worker_cache.get_many(list(unique)) if _worker_cache else {}
+    pending = [key for key in unique if key not in known]
+
+    inferred = dict(zip(
+        pending,
+        classify_texts(
+            classifier,
+            [unique[key] for key in pending],
+            max_length=max_length,
+            bucket_size=bucket_size,
+            timings=timings
+        )
+    ))
+
+    if _worker_cache:
+        fresh = {
+            key: classification for key, classification in inferred.items()
+            if not isinstance(classification, Exception)
+        }
+        if fresh:
+            _worker_cache.put_many(fresh)
+
+    return [known[key] if key in known else inferred[key] for key in keys]
+
+
+def _error_fields(message_id, error):
+    """Logs a message that failed on its own and describes the failure
+
+    Returns:
+        tuple: (error, error_type)
+    """
+    if isinstance(error, ValueError):
+        logger.warning("Validation error for message %s: %s", message_id, error)
+        return str(error), "ValidationError"
+    if isinstance(error, RuntimeError):
+        logger.error("Processing error for message %s: %s", message_id, error)
+        return str(error), "ProcessingError"
+
+    logger.error("Unexpected error for message %s: %s", message_id, error, exc_info=error)
+    return f"Unexpected error: {str(error)}", "UnexpectedError"
+
+
+def _error_result(message, error, current_time):
+    """Builds the error payload for a message that failed on its own"""
+    base_message = message if isinstance(message, dict) else {"raw_message": str(message)}
+    error_text, error_type = _error_fields(_message_id(message), error)
+
+    return {
+        **base_message,
+        "error": error_text,
+        "error_type": error_type,
+        "classified_at": current_time,
+        "status": "error"
+    }
+
+def _result_record(result):
+    """Flattens a result into the fields stored in its result hash"""
+    record = {
+        "status": result.get("status", "error"),
+        "classified_at": result.get("classified_at", ""),
+    }
+
+    classification = result.get("classification")
+    if classification:
+        record["label"] = classification["label"]
+        record["score"] = classification["score"]
+    else:
+        record["error"] = str(result.get("error", ""))
+        record["error_type"] = result.get("error_type", "")
+
+    return record
+
+
 class BERTClassifier:
     """Classification model class"""
     def __init__(
@@ -97,7 +525,30 @@ class BERTClassifier:
         num_workers = 2,
         batch_size = 8,
         poll_timeout = 1,
+        max_wait_ms = 0,
         device = "cpu",
+        max_batches_per_worker = None,
+        max_rss_growth_mb = None,
+        max_length = DEFAULT_MAX_LENGTH,
+        bucket_size = DEFAULT_BUCKET_SIZE,
+        result_ttl = 86400,
+        result_stream = RESULT_STREAM,
+        result_stream_maxlen = 100000,
+        result_queue_maxlen = 0,
+        cache_size = 0,
+        cache_ttl = 0,
+        normaliser_workers = 0,
+        backend = "torch",
+        transport = "list",
+        input_stream = INPUT_STREAM,
+        stream_claim_idle_ms = 60000,
+        queue_monitor_interval = 0,
+        autoscaler = None,
+        share_weights = False,
+        lanes = None,
+        cpu_layout = False,
+        threads_per_worker = 0,
+        pin_workers = False,
     ) -> None:
 
         self.input_queue = input_queue
@@ -107,113 +558,779 @@ class BERTClassifier:
         self.num_workers = num_workers
         self.batch_size = batch_size
         self.poll_timeout = poll_timeout
+        self.max_wait_ms = max_wait_ms
         self.device = device
+        self.max_batches_per_worker = max_batches_per_worker
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.max_length = max_length
+        self.bucket_size = bucket_size
+        self.result_ttl = result_ttl
+        self.result_stream = result_stream
+        self.result_stream_maxlen = result_stream_maxlen
+        self.result_queue_maxlen = result_queue_maxlen
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.normaliser_workers = normaliser_workers
+        self.backend = backend
+        self.transport = transport
+        self.input_stream = input_stream
+        self.stream_claim_idle_ms = stream_claim_idle_ms
+        self.queue_monitor_interval = queue_monitor_interval
+        self.autoscaler = autoscaler
+        self.share_weights = share_weights
+        self.cpu_layout = cpu_layout
+        self.threads_per_worker = threads_per_worker
+        self.pin_workers = pin_workers
+        self.layout = None
+
+        # Messages enqueued without a lane land on the default one, which
+        # is therefore always consumed
+        self.lanes = dict(lanes or {})
+        self.lanes.setdefault(DEFAULT_LANE, 1)
+        self.scheduler = LaneScheduler(self.lanes)
+        self._lane_queues = {lane: lane_key(input_queue, lane) for lane in self.lanes}
+        self._lane_streams = {lane: lane_key(input_stream, lane) for lane in self.lanes}
+        self._queue_lanes = {key: lane for lane, key in self._lane_queues.items()}
+        self._stream_lanes = {key: lane for lane, key in self._lane_streams.items()}
+        self._lane_fetched = {lane: LANE_MESSAGES.labels(lane=lane) for lane in self.lanes}
+        self._lane_latency = {lane: END_TO_END_LATENCY.labels(lane=lane) for lane in self.lanes}
+
+        if share_weights and device != "cpu":
+            raise ValueError("Shared model weights require the cpu device, CUDA state cannot be forked")
+        if share_weights and backend == "onnx":
+            raise ValueError("Shared model weights support the torch and int8 backends")
+        if share_weights and max_batches_per_worker:
+            logger.warning("max_batches_per_worker is ignored with shared model weights")
+        self.consumer_name = f"{socket.gethostname()}-{os.getpid()}"
 
         self.redis_client = None
+        self.input_client = None
         self._running = False
+        self._executor = None
+        self._normaliser_executor = None
+        self._last_claim = 0.0
+        # Batches fetched and not yet published or errored
+        self._in_flight = set()
 
     async def initialize(self):
-        """Initialize Redis client connection
+        """Initialize Redis client connections and, on the stream
+        transport, the consumer group
+
+        Input payloads are read through a second client that leaves them
+        as bytes, so both JSON and binary payloads reach ``codec.decode``
+        undecoded.
         """
         try:
             self.redis_client = await get_async_client()
+            self.input_client = await get_async_binary_client()
+
+            if self.transport == "stream":
+                await self._ensure_stream_group()
         except RedisError as e:
             logger.error("Error initializing redis async redis client: %s", e)
             raise
 
+    async def _ensure_stream_group(self):
+        for stream in self._lane_streams.values():
+            try:
+                await self.redis_client.xgroup_create(
+                    stream, STREAM_GROUP, id="0", mkstream=True
+                )
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    def _create_executor(self):
+        """Creates a process pool whose workers keep the model resident
+
+        Workers are replaced by the pool itself after ``max_batches_per_worker``
+        batches; RSS based recycling is handled by ``_recycle_executor``.
+
+        With ``share_weights`` the model is loaded once in this process and
+        the workers are forked from it, sharing the weights copy-on-write,
+        so new workers and recycled pools start without reloading it.
+        ``fork`` pools cannot replace single workers, so
+        ``max_batches_per_worker`` does not apply.
+
+        With ``cpu_layout`` the CPU budget is split between the workers,
+        see ``topology.plan_layout``.
+
+        With an ``autoscaler`` the pool is sized for ``max_workers`` and
+        the infer stage keeps at most ``num_workers`` batches in it, so a
+        resize changes the concurrency without replacing the pool. The
+        pool then uses ``spawn``, which starts a worker, and loads its
+        model, only when a batch finds no idle one; with
+        ``share_weights`` it stays a ``fork`` pool, which starts all
+        ``max_workers`` up front, sharing the weights.
+        """
+        if self.share_weights:
+            context = multiprocessing.get_context("fork")
+        elif self.max_batches_per_worker or self.autoscaler:
+            # What ProcessPoolExecutor picks for max_tasks_per_child, made
+            # explicit so the slot array belongs to the same context. Unlike
+            # fork pools, spawn pools also start their workers on demand
+            context = multiprocessing.get_context("spawn")
+        else:
+            context = multiprocessing.get_context()
+        layout = slots = None
+
+        if self.cpu_layout:
+            layout = plan_layout(self._pool_size, self.threads_per_worker, self.pin_workers)
+            if layout != self.layout:
+                logger.info("Worker CPU layout: %s", layout.describe())
+            self.layout = layout
+            # Replacement workers take over the core set of the worker they replace
+            slots = context.Array("i", layout.workers) if layout.core_sets else None
+
+        initargs = (
+            self.model_name,
+            self.device,
+            self.max_length,
+            self.cache_size,
+            self.cache_ttl,
+            self.backend,
+            layout,
+            slots
+        )
+
+        if self.share_weights:
+            if _worker_classifier is None:
+                _load_shared_model(self.model_name, self.device, self.backend)
+
+            return ProcessPoolExecutor(
+                max_workers=self._pool_size,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=initargs,
+            )
+
+        return ProcessPoolExecutor(
+            max_workers=self._pool_size,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=initargs,
+            max_tasks_per_child=self.max_batches_per_worker or None,
+        )
+
+    @property
+    def _pool_size(self):
+        """Most worker processes, and so batches in inference, at once"""
+        return self.autoscaler.max_workers if self.autoscaler else self.num_workers
+
+    def _recycle_executor(self, reporter=None):
+        """Replaces the process pool, letting in-flight batches finish on the old one
+
+        ``ProcessPoolExecutor`` cannot retire a single worker, so an RSS
+        report replaces the whole pool. Reports from workers of a pool
+        already replaced are ignored, so several workers crossing the
+        limit in the same window recycle the pool once.
+
+        Args:
+            reporter: Pool whose worker requested the recycle, ``None``
+                to recycle unconditionally
+        """
+        if reporter is not None and reporter is not self._executor:
+            logger.debug("Ignoring recycle request from a pool already replaced")
+            return
+
+        old_executor = self._executor
+        self._executor = self._create_executor()
+        old_executor.shutdown(wait=False)
+        logger.info("Recycled classifier worker pool")
+
     async def start_consuming(self):
-        """Consumes the queue"""
+        """Consumes the queue
+
+        Runs four concurrent stages connected by bounded queues: fetch,
+        normalise, infer and publish. Up to ``num_workers`` batches are in
+        inference at once, and a full stage queue makes the stage before
+        it wait, so fetching stops when the workers fall behind. When
+        cancelled, the batches still in the stages go back to the input
+        (see ``_requeue``).
+        """
         self._running = True
-        
-        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
-            batch = []
 
-            while self._running:
-                try:
-                    msg_raw = await self.redis_client.brpop(
-                        self.input_queue,
-                        timeout=self.poll_timeout
-                    )
+        if self.autoscaler:
+            self.batch_size = self.autoscaler.clamp_batch_size(self.batch_size)
+            self.num_workers = self.autoscaler.clamp_workers(self.num_workers)
+
+        BATCH_SIZE_TARGET.set(self.batch_size)
+        ACTIVE_WORKERS.set(self.num_workers)
+        self._executor = self._create_executor()
+
+        if self.normaliser_workers:
+            # Enelvo is pure Python, so the stage gets its own processes
+            # rather than threads competing for the event loop's GIL
+            self._normaliser_executor = ProcessPoolExecutor(max_workers=self.normaliser_workers)
+
+        fetched = asyncio.Queue(maxsize=self._pool_size)
+        normalised = asyncio.Queue(maxsize=self._pool_size)
+        classified = asyncio.Queue(maxsize=self._pool_size)
+
+        stages = [
+            asyncio.create_task(self._fetch_stage(fetched)),
+            asyncio.create_task(self._run_stage(
+                fetched, normalised, self._normalise_batch, max(1, self.normaliser_workers)
+            )),
+            asyncio.create_task(self._run_stage(
+                normalised, classified, self._infer_batch, lambda: self.num_workers
+            )),
+            asyncio.create_task(self._run_stage(
+                classified, None, self._publish_batch, 1
+            )),
+        ]
+
+        monitors = []
+        if self.queue_monitor_interval:
+            monitors.append(asyncio.create_task(self._monitor_queues()))
+        if self.autoscaler:
+            monitors.append(asyncio.create_task(self._autoscale()))
+
+        try:
+            await asyncio.gather(*stages)
+        except asyncio.CancelledError:
+            logger.info("Processing cancelled, shutting down gracefully")
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            await self._release_in_flight()
+        finally:
+            for monitor in monitors:
+                monitor.cancel()
+
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+            if self._normaliser_executor is not None:
+                self._normaliser_executor.shutdown(wait=True)
+                self._normaliser_executor = None
+
+    async def _monitor_queues(self):
+        """Refreshes the queue and lane depth gauges every
+        ``queue_monitor_interval`` seconds"""
+        lanes = tuple(self.lanes)
+
+        while True:
+            try:
+                for queue, depth in (await queue_depths(self.redis_client, lanes=lanes)).items():
+                    QUEUE_DEPTH.labels(queue=queue).set(depth)
+                if len(lanes) > 1:
+                    for lane, depth in (await lane_depths(self.redis_client, lanes)).items():
+                        LANE_DEPTH.labels(lane=lane).set(depth)
+            except RedisError as e:
+                logger.warning("Failed to read queue depths: %s", e)
+
+            await asyncio.sleep(self.queue_monitor_interval)
+
+    async def _autoscale(self):
+        """Applies the autoscaler's decisions every ``autoscaler.interval`` seconds
+
+        Worker changes only move the infer stage's concurrency limit, the
+        pool already has room for ``max_workers`` (see ``_create_executor``).
+        """
+        while True:
+            await asyncio.sleep(self.autoscaler.interval)
+
+            try:
+                backlog = (await queue_depths(
+                    self.redis_client, queues=(), lanes=tuple(self.lanes)
+                ))[INPUT_QUEUE]
+            except RedisError as e:
+                logger.warning("Failed to read the input backlog: %s", e)
+                continue
+
+            decision = self.autoscaler.decide(backlog, self.batch_size, self.num_workers)
+            if decision.action == "hold":
+                continue
+
+            logger.info(
+                "Autoscaler %s: batch size %d -> %d, workers %d -> %d (%s)",
+                decision.action, self.batch_size, decision.batch_size,
+                self.num_workers, decision.workers, decision.reason
+            )
+            AUTOSCALE_DECISIONS.labels(action=decision.action).inc()
+
+            self.batch_size = decision.batch_size
+            BATCH_SIZE_TARGET.set(self.batch_size)
 
-                    if msg_raw:
-                        _,msg_json = msg_raw
-                        msg_data = json.loads(msg_json)
+            if decision.workers != self.num_workers:
+                self.num_workers = decision.workers
+                ACTIVE_WORKERS.set(self.num_workers)
 
-                        batch.append(msg_data)
+    async def _fetch_stage(self, outbox):
+        """Fetches and decodes batches until the classifier is stopped"""
+        while self._running:
+            try:
+                entries = await self._fetch_batch()
+
+                if not entries:
+                    continue
+
+                batch = await self._decode_batch(entries)
+
+                if batch.messages:
+                    await outbox.put(batch)
+
+            except RedisError as e:
+                logger.error("Redis connection error: %s", e)
+                await asyncio.sleep(5)
+            except Exception as e:
+                logger.exception("Unexpected error in consumer loop: %s", e)
+                await asyncio.sleep(1)
+
+        await outbox.put(_STOP)
+
+    async def _run_stage(self, inbox, outbox, handler, concurrency):
+        """Feeds items from ``inbox`` to ``handler`` with at most
+        ``concurrency`` running at once, forwarding non-``None`` outputs
+
+        ``concurrency`` may be a callable, read before each item, so the
+        limit can change while the stage runs. When the stop marker
+        arrives, waits for the running items and passes the marker on, so
+        stages drain in order on shutdown.
+        """
+        limit = concurrency if callable(concurrency) else lambda: concurrency
+        running = set()
+
+        async def run(item):
+            output = await handler(item)
+            if output is not None and outbox is not None:
+                await outbox.put(output)
+
+        try:
+            while (item := await inbox.get()) is not _STOP:
+                while len(running) >= limit():
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    running.difference_update(done)
+
+                task = asyncio.create_task(run(item))
+                running.add(task)
+                task.add_done_callback(running.discard)
 
-                        if len(batch) >= self.batch_size:
-                            await self._process_batch(batch, executor)
-                            batch = []
+            if running:
+                await asyncio.gather(*running)
+        except asyncio.CancelledError:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+        if outbox is not None:
+            await outbox.put(_STOP)
 
-                    elif batch:
-                        await self._process_batch(batch, executor)
-                        batch = []
+    async def _fetch_batch(self):
+        """Fetches up to ``batch_size`` raw messages from the input lanes
 
-                except asyncio.CancelledError:
-                    logger.info("Processing cancelled, shutting down gracefully")
+        On the stream transport, entries left pending by dead consumers
+        for longer than ``stream_claim_idle_ms`` are reclaimed with
+        ``XAUTOCLAIM`` first. Otherwise the lanes are drained without
+        blocking, sharing the batch between them by weight (see
+        ``_drain_lanes``). When they are all empty, blocks up to
+        ``poll_timeout`` seconds for the first message on any lane, highest
+        priority first. If the batch is still short, keeps waiting for
+        more until ``max_wait_ms`` after the first message has passed.
+
+        Returns:
+            list: ``(entry, payload)`` pairs, empty when the transport
+            stayed idle. ``entry`` is the ``(stream, entry_id)`` to
+            acknowledge, ``None`` for the list transport
+        """
+        if self.transport == "stream":
+            claimed = await self._claim_stale_entries()
+            if claimed:
+                return claimed
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        # Filled in place by the helpers, so a cancellation between two
+        # reads still finds every popped message here
+        batch = []
+
+        try:
+            await self._drain_lanes(self.batch_size, batch)
+
+            if not batch:
+                await self._wait_lanes(self.poll_timeout, batch)
+
+                if not batch:
+                    return []
+
+                started = loop.time()
+
+            deadline = started + self.max_wait_ms / 1000
+
+            while len(batch) < self.batch_size:
+                if await self._drain_lanes(self.batch_size - len(batch), batch):
+                    continue
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
                     break
-                except RedisError as e:
-                    logger.error("Redis connection error: %s", e)
-                    await asyncio.sleep(5)
-                except json.JSONDecodeError as e:
-                    logger.error("Invalid JSON in message: %s", e)
-                    await asyncio.sleep(1)
-                except Exception as e:
-                    logger.exception("Unexpected error in consumer loop: %s", e)
-                    await asyncio.sleep(1)
-
-            if batch:
-                await self._process_batch(batch, executor)
-
-    async def _process_batch(self, batch, executor):
-        """Processes the batch"""
+
+                if not await self._wait_lanes(remaining, batch):
+                    break
+
+        except asyncio.CancelledError:
+            # Stopped while waiting to fill the batch
+            await self._requeue(batch)
+            raise
+
+        _STAGE_TIMERS["fetch"].observe(loop.time() - started)
+
+        return batch
+
+    async def _claim_stale_entries(self):
+        """Reclaims up to ``batch_size`` entries idle for longer than
+        ``stream_claim_idle_ms``, at most once per that interval"""
+        loop = asyncio.get_running_loop()
+
+        if loop.time() - self._last_claim < self.stream_claim_idle_ms / 1000:
+            return []
+
+        self._last_claim = loop.time()
+        claimed = []
+
+        for stream in self._lane_streams.values():
+            if len(claimed) >= self.batch_size:
+                break
+
+            _, entries, _ = await self.input_client.xautoclaim(
+                stream,
+                STREAM_GROUP,
+                self.consumer_name,
+                min_idle_time=self.stream_claim_idle_ms,
+                count=self.batch_size - len(claimed)
+            )
+            claimed.extend(self._stream_entries(stream, entries))
+
+        if claimed:
+            logger.warning("Reclaimed %d stale stream entries", len(claimed))
+
+        return claimed
+
+    async def _drain_lanes(self, count, drained):
+        """Takes up to ``count`` queued messages from the lanes without blocking
+
+        The slots are shared by ``scheduler`` between the lanes not yet
+        found empty, and each lane's share is read with one ``RPOP count``
+        or ``XREADGROUP COUNT``, all in a single round trip. Slots a lane
+        could not fill are shared again between the others.
+
+        Args:
+            count: Most messages to take
+            drained: List the ``(entry, payload)`` pairs are appended to
+
+        Returns:
+            int: Messages taken
+        """
+        active = list(self.lanes)
+        taken = 0
+
+        def collect(shares, replies):
+            collected = 0
+            for (lane, share), reply in zip(shares.items(), replies):
+                if self.transport == "stream":
+                    stream = self._lane_streams[lane]
+                    entries = self._stream_entries(stream, reply[0][1]) if reply else []
+                else:
+                    entries = [(None, payload) for payload in reply or ()]
+
+                if entries:
+                    self._lane_fetched[lane].inc(len(entries))
+                    drained.extend(entries)
+                    collected += len(entries)
+
+                if len(entries) < share:
+                    self.scheduler.idle(lane)
+                    active.remove(lane)
+            return collected
+
+        while count > 0 and active:
+            shares = self.scheduler.allocate(count, active)
+
+            async with self.input_client.pipeline(transaction=False) as pipe:
+                for lane, share in shares.items():
+                    if self.transport == "stream":
+                        pipe.xreadgroup(
+                            STREAM_GROUP,
+                            self.consumer_name,
+                            {self._lane_streams[lane]: ">"},
+                            count=share
+                        )
+                    else:
+                        pipe.rpop(self._lane_queues[lane], share)
+                collected = await _finish(pipe.execute(), partial(collect, shares))
+
+            count -= collected
+            taken += collected
+
+        return taken
+
+    async def _wait_lanes(self, timeout, batch):
+        """Blocks up to ``timeout`` seconds for messages on any lane
+
+        ``BRPOP`` returns one message from the first non-empty lane in
+        priority order; ``XREADGROUP`` up to one entry per lane.
+
+        Args:
+            timeout: Seconds to wait
+            batch: List the ``(entry, payload)`` pairs are appended to
+
+        Returns:
+            int: Messages taken
+        """
+        if self.transport == "stream":
+            # Entries read here stay pending until acked, nothing to protect
+            response = await self.input_client.xreadgroup(
+                STREAM_GROUP,
+                self.consumer_name,
+                {stream: ">" for stream in self._lane_streams.values()},
+                count=1,
+                # BLOCK 0 would wait forever
+                block=max(1, int(timeout * 1000))
+            )
+
+            taken = 0
+            for stream, stream_entries in response or ():
+                stream = stream.decode()
+                self._lane_fetched[self._stream_lanes[stream]].inc(len(stream_entries))
+                batch.extend(self._stream_entries(stream, stream_entries))
+                taken += len(stream_entries)
+            return taken
+
+        def collect(popped):
+            if not popped:
+                return 0
+            self._lane_fetched[self._queue_lanes[popped[0].decode()]].inc()
+            batch.append((None, popped[1]))
+            return 1
+
+        return await _finish(
+            self.input_client.brpop(
+                list(self._lane_queues.values()),
+                # Redis rounds timeouts to milliseconds and 0 would wait forever
+                timeout=max(timeout, 0.001)
+            ),
+            collect
+        )
+
+    @staticmethod
+    def _stream_entries(stream, entries):
+        # Entries trimmed by MAXLEN while pending come back without fields
+        return [
+            ((stream, entry_id), fields.get(_PAYLOAD_FIELD) if fields else None)
+            for entry_id, fields in entries
+        ]
+
+    async def _decode_batch(self, entries):
+        """Decodes raw payloads; invalid ones are dropped (and acknowledged
+        on the stream transport so they are not redelivered)"""
+        batch = _Batch()
+        invalid = []
+
+        for entry, payload in entries:
+            try:
+                batch.messages.append(codec.decode(payload))
+                batch.entries.append(entry)
+                batch.payloads.append(payload)
+            except CodecError as e:
+                logger.error("Invalid message payload: %s", e)
+                invalid.append(entry)
+
+        for stream, entry_ids in _group_acks(invalid).items():
+            await self.redis_client.xack(stream, STREAM_GROUP, *entry_ids)
+
+        batch.texts = message_texts(batch.messages)
+        if batch.messages:
+            self._in_flight.add(batch)
+        return batch
+
+    async def _normalise_batch(self, batch):
+        """Normalise stage: validates and normalises in the normaliser
+        pool, or defers both to the inference worker when there is none"""
+        if self._normaliser_executor is None:
+            return batch
+
+        try:
+            started = time.perf_counter()
+            valid = _valid_indexes(batch.texts)
+            normalised = await asyncio.get_running_loop().run_in_executor(
+                self._normaliser_executor,
+                normalise_texts,
+                [batch.texts[index] for index in valid]
+            )
+            for index, text in zip(valid, normalised):
+                batch.texts[index] = text
+            batch.normalised = True
+            _STAGE_TIMERS["normalise"].observe(time.perf_counter() - started)
+            return batch
+
+        except Exception as e:
+            logger.exception("Error normalising batch of %d messages: %s", len(batch.messages), e)
+            await self._handle_batch_error(batch, str(e))
+            return None
+
+    async def _infer_batch(self, batch):
+        """Infer stage: classifies the batch's valid texts in the worker
+        pool and merges the classifications into its messages"""
         try:
-            results = await asyncio.get_event_loop().run_in_executor(
+            started = time.perf_counter()
+            valid = _valid_indexes(batch.texts)
+            executor = self._executor
+            outcomes, needs_recycle, timings, cache_counts = await asyncio.get_running_loop().run_in_executor(
                 executor,
-                _classify_batch_worker,
-                batch,
+                _classify_batch_task,
+                [batch.texts[index] for index in valid],
+                [_message_id(batch.messages[index]) for index in valid],
                 self.model_name,
-                self.device
+                self.device,
+                self.max_length,
+                self.bucket_size,
+                self.max_rss_growth_mb,
+                batch.normalised,
+                self.backend
             )
+            batch.results = _merge_outcomes(batch.messages, batch.texts, valid, outcomes)
+
+            for stage, seconds in timings.items():
+                _STAGE_TIMERS[stage].observe(seconds)
+            for field, count in cache_counts.items():
+                if count:
+                    _CACHE_LOOKUPS[field].inc(count)
+
+            if self.autoscaler:
+                self.autoscaler.record(time.perf_counter() - started)
+
+            if needs_recycle:
+                self._recycle_executor(reporter=executor)
+
+            return batch
+
+        except Exception as e:
+            logger.exception("Error processing batch of %d messages: %s", len(batch.messages), e)
+            await self._handle_batch_error(batch, str(e))
+            return None
+
+    async def _publish_batch(self, batch):
+        """Publish stage: writes the results of a classified batch"""
+        try:
+            started = time.perf_counter()
+            await self._publish_results(batch.results, batch.acks)
+            _STAGE_TIMERS["publish"].observe(time.perf_counter() - started)
+            BATCH_SIZE.observe(len(batch.messages))
+            self._in_flight.discard(batch)
             
-            await self._publish_results(results)
-            
-            logger.info("Completed batch of %d messages", len(batch))
+            logger.info("Completed batch of %d messages", len(batch.messages))
             
-        except asyncio.CancelledError:
-            logger.warning("Batch processing was cancelled")
-            await self._handle_batch_error(batch, "Batch processing cancelled")
-            raise
         except Exception as e:
-            logger.exception("Error processing batch of %d messages: %s", len(batch), e)
+            logger.exception("Error publishing batch of %d messages: %s", len(batch.messages), e)
             await self._handle_batch_error(batch, str(e))
 
-    async def _publish_results(self, results):
-        """Publishes results to the output queue"""
+    async def _publish_results(self, results, acks=None):
+        """Publishes a batch of results in a single MULTI/EXEC round trip
+
+        Results are grouped by destination queue and written with one
+        variadic ``LPUSH`` per queue plus one multi-field ``HSET`` on
+        ``msg_index``. Redis does not roll a transaction back when one of
+        its commands fails at runtime (e.g. ``WRONGTYPE``), so when it
+        raises part of the batch may already be written;
+        ``_handle_batch_error`` skips messages that already have a result.
+        Results that cannot be serialized are sent to the error queue.
+        Stream entries in ``acks`` are acknowledged in the same
+        transaction, so an entry is only acked once its result exists.
+
+        Raises:
+            RedisError: If the transaction could not be applied
+        """
+        grouped = {self.output_queue: [], self.error_queue: []}
+        index_updates = {}
+        records = {}
+
         for result in results:
             message_id = result.get("id", "unknown")
+            queue_name = self.output_queue if "classification" in result else self.error_queue
+
             try:
-                queue_name = self.output_queue if "classification" in result else self.error_queue
-                
-                try:
-                    result_json = json.dumps(result, ensure_ascii=False)
-                except (TypeError, ValueError) as e:
-                    logger.error("Failed to serialize result for message %s: %s", message_id, e)
-                    continue
-                
-                try:
-                    await self.redis_client.lpush(queue_name, result_json)
-                    await self.redis_client.hset("msg_index", message_id, queue_name)
-                except RedisError as e:
-                    logger.error("Redis error publishing result for message %s: %s", message_id, e)
-                    raise
-                
-                logger.debug("Published result for message: %s", message_id)
-                
-            except RedisError:
-                raise
-            except Exception as e:
-                logger.exception("Unexpected error publishing result for message %s: %s", message_id, e)
+                result_json = codec.dumps_json(result)
+            except (TypeError, ValueError) as e:
+                logger.error("Failed to serialize result for message %s: %s", message_id, e)
+                queue_name = self.error_queue
+                result = {
+                    "id": message_id,
+                    "error": f"Result serialization failed: {e}",
+                    "error_type": "SerializationError",
+                    "classified_at": self._current_timestamp(),
+                    "status": "error"
+                }
+                result_json = codec.dumps_json(result)
+
+            grouped[queue_name].append(result_json)
+            index_updates[message_id] = queue_name
+            records[message_id] = _result_record(result)
+
+        await self._publish(grouped, index_updates, records, acks)
+        logger.debug("Published %d results", len(results))
+
+        now = time.time()
+        for result in results:
+            enqueued_at = result.get("enqueued_at")
+            if isinstance(enqueued_at, (int, float)):
+                latency = self._lane_latency.get(result.get("lane"), self._lane_latency[DEFAULT_LANE])
+                latency.observe(now - enqueued_at)
+
+        _CLASSIFIED.inc(len(grouped[self.output_queue]))
+        _ERRORED.inc(len(grouped[self.error_queue]))
+
+    async def _publish(self, grouped, index_updates, records, acks=None):
+        """Writes grouped payloads, their ``msg_index`` entries and
+        per-message result hashes atomically
+
+        Every written ``msg_index`` field and result hash expires after
+        ``result_ttl`` seconds. Payloads are also appended to the result
+        stream, capped at about ``result_stream_maxlen`` entries, for
+        ``GET /api/results/stream``, and the result lists are trimmed to
+        their newest ``result_queue_maxlen`` entries when set. The ids are
+        then announced on ``RESULT_CHANNEL`` to wake up API requests
+        waiting on them.
+
+        Args:
+            grouped: Mapping of queue name to serialized payloads
+            index_updates: Mapping of message id to queue name
+            records: Mapping of message id to result hash fields
+            acks: Mapping of input stream to entry ids to acknowledge
+        """
+        if not index_updates and not acks:
+            return
+
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                for queue_name, payloads in grouped.items():
+                    if payloads:
+                        pipe.lpush(queue_name, *payloads)
+                        if self.result_queue_maxlen:
+                            pipe.ltrim(queue_name, 0, self.result_queue_maxlen - 1)
+                    if self.result_stream_maxlen:
+                        for payload in payloads:
+                            pipe.xadd(
+                                self.result_stream,
+                                {STREAM_PAYLOAD_FIELD: payload},
+                                maxlen=self.result_stream_maxlen,
+                                approximate=True
+                            )
+                if index_updates:
+                    pipe.hset(MSG_INDEX, mapping=index_updates)
+                    pipe.hexpire(MSG_INDEX, self.result_ttl, *index_updates)
+                for message_id, record in records.items():
+                    pipe.hset(result_key(message_id), mapping=record)
+                    pipe.expire(result_key(message_id), self.result_ttl)
+                if index_updates:
+                    pipe.publish(RESULT_CHANNEL, json.dumps(list(index_updates)))
+                for stream, entry_ids in (acks or {}).items():
+                    pipe.xack(stream, STREAM_GROUP, *entry_ids)
+                await pipe.execute()
+        except RedisError as e:
+            logger.error("Redis error publishing %d results: %s", len(index_updates), e)
+            raise
 
     async def stop(self):
         """Stops the model"""
@@ -221,37 +1338,132 @@ class BERTClassifier:
 
         if self.redis_client:
             await self.redis_client.close()
+        if self.input_client:
+            await self.input_client.close()
             
         logger.info("BERT classifier stopped")
         
 
+    async def _release_in_flight(self):
+        """Returns the batches still in the stages to the input on shutdown"""
+        entries = [
+            pair for batch in self._in_flight for pair in zip(batch.entries, batch.payloads)
+        ]
+        self._in_flight.clear()
+
+        try:
+            await self._requeue(entries)
+        except RedisError as e:
+            logger.error("Failed to return %d messages to the input: %s", len(entries), e)
+
+    async def _requeue(self, entries):
+        """Returns fetched messages to the input so they are not lost
+
+        Stream entries are left pending in the consumer group, where
+        ``XAUTOCLAIM`` hands them to another consumer. List payloads are
+        pushed back unchanged onto the tail of the lane they were popped
+        from, where they were, so they are fetched again first.
+
+        Args:
+            entries: ``(entry, payload)`` pairs as returned by ``_fetch_batch``
+        """
+        lanes = {}
+        for entry, payload in entries:
+            if entry is None:
+                lanes.setdefault(self._payload_lane_queue(payload), []).append(payload)
+
+        pending = len(entries) - sum(len(payloads) for payloads in lanes.values())
+        if pending:
+            logger.warning("Leaving %d stream entries pending for redelivery", pending)
+
+        if lanes:
+            async with self.input_client.pipeline(transaction=False) as pipe:
+                for queue, payloads in lanes.items():
+                    # RPOP returned them from the tail inwards; pushing them back
+                    # in reverse restores their positions, first popped at the tail
+                    pipe.rpush(queue, *reversed(payloads))
+                await pipe.execute()
+
+            logger.warning("Returned %d messages to the input queue", len(entries) - pending)
+
+    def _payload_lane_queue(self, payload):
+        """Input list of the lane a raw payload was enqueued on"""
+        try:
+            message = codec.decode(payload)
+        except CodecError:
+            message = None
+
+        lane = message.get("lane") if isinstance(message, dict) else None
+        if not isinstance(lane, str) or lane not in self._lane_queues:
+            lane = DEFAULT_LANE
+        return self._lane_queues[lane]
+
     async def _handle_batch_error(self, batch, error):
         """Handle errors for an entire batch by publishing to error queue
 
+        Messages that already have a result hash, e.g. written by a
+        partially applied ``_publish`` transaction, are not published
+        again.
+
         Args:
-            batch: List of messages that failed processing
+            batch: Batch whose messages failed processing
             error: Error message describing the failure
         """
-        for message in batch:
+        self._in_flight.discard(batch)
+
+        timestamp = self._current_timestamp()
+        payloads = []
+        index_updates = {}
+        records = {}
+        published = await self._published_ids([_message_id(message) for message in batch.messages])
+
+        for message in batch.messages:
             message_id = message.get("id", "unknown") if isinstance(message, dict) else "unknown"
+            if message_id in published:
+                continue
+            base_message = message if isinstance(message, dict) else {"raw_message": str(message)}
+            error_result = {
+                **base_message,
+                "error": error,
+                "error_type": "BatchProcessingError",
+                "classified_at": timestamp,
+                "status": "error"
+            }
+
             try:
-                base_message = message if isinstance(message, dict) else {"raw_message": str(message)}
-                error_result = {
-                    **base_message,
-                    "error": error,
-                    "error_type": "BatchProcessingError",
-                    "classified_at": self._current_timestamp(),
-                    "status": "error"
-                }
-                
-                await self.redis_client.lpush(
-                    self.error_queue,
-                    json.dumps(error_result)
-                )
-                logger.debug("Published batch error for message %s", message_id)
-                
-            except Exception as e:
-                logger.error("Failed to publish batch error for message %s: %s", message_id, e)
+                payloads.append(codec.dumps_json(error_result))
+            except (TypeError, ValueError) as e:
+                logger.error("Failed to serialize batch error for message %s: %s", message_id, e)
+                continue
+
+            index_updates[message_id] = self.error_queue
+            records[message_id] = _result_record(error_result)
+
+        try:
+            await self._publish(
+                {self.error_queue: payloads}, index_updates, records, batch.acks
+            )
+            logger.debug("Published batch error for %d messages", len(payloads))
+        except Exception as e:
+            logger.error("Failed to publish batch error for %d messages: %s", len(payloads), e)
     
+    async def _published_ids(self, message_ids):
+        """Ids among ``message_ids`` that already have a result hash"""
+        # Messages without an id share the "unknown" key
+        message_ids = [message_id for message_id in message_ids if message_id != "unknown"]
+        if not message_ids:
+            return set()
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for message_id in message_ids:
+                    pipe.exists(result_key(message_id))
+                found = await pipe.execute()
+        except RedisError as e:
+            logger.warning("Failed to check for published results: %s", e)
+            return set()
+
+        return {message_id for message_id, exists in zip(message_ids, found) if exists}
+
     def _current_timestamp(self):
         return datetime.utcnow().isoformat()
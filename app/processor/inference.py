@@ -0,0 +1,120 @@
+"""Batched forward passes over a text-classification pipeline"""
+import time
+import torch
+from ..utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_LENGTH = 512
+DEFAULT_BUCKET_SIZE = 16
+
+
+def _forward(classifier, encodings, timings=None):
+    """Runs a single padded forward pass
+
+    Args:
+        classifier: Hugging Face text-classification pipeline
+        encodings: List of unpadded tokenizer outputs
+        timings: Optional dict accumulating seconds under ``"forward"``
+
+    Returns:
+        list: One ``{"label", "score"}`` dict per encoding
+    """
+    started = time.perf_counter()
+    inputs = classifier.tokenizer.pad(encodings, padding=True, return_tensors="pt")
+    inputs = {key: value.to(classifier.device) for key, value in inputs.items()}
+
+    with torch.inference_mode():
+        logits = classifier.model(**inputs).logits
+
+    config = classifier.model.config
+    if config.num_labels == 1 or config.problem_type == "multi_label_classification":
+        scores = torch.sigmoid(logits)
+    else:
+        scores = torch.softmax(logits, dim=-1)
+
+    top_scores, top_ids = scores.max(dim=-1)
+
+    if timings is not None:
+        timings["forward"] = timings.get("forward", 0.0) + time.perf_counter() - started
+
+    return [
+        {"label": config.id2label[label_id], "score": score}
+        for label_id, score in zip(top_ids.tolist(), top_scores.tolist())
+    ]
+
+
+def _split_encodings(encoded, indices):
+    return [{key: encoded[key][i] for key in encoded.keys()} for i in indices]
+
+
+def classify_single(classifier, text, max_length=DEFAULT_MAX_LENGTH):
+    """Classifies one text on its own
+
+    Returns:
+        dict | Exception: Classification, or the exception raised for this text
+    """
+    try:
+        encoded = classifier.tokenizer([text], truncation=True, max_length=max_length)
+        return _forward(classifier, _split_encodings(encoded, [0]))[0]
+    except Exception as e:
+        return e
+
+
+def classify_texts(
+    classifier,
+    texts,
+    max_length=DEFAULT_MAX_LENGTH,
+    bucket_size=DEFAULT_BUCKET_SIZE,
+    timings=None
+):
+    """Classifies texts with one padded forward pass per length bucket
+
+    Texts are sorted by token length and split into buckets of ``bucket_size``
+    so short texts are not padded to the length of the longest one. When a
+    bucket fails, its texts are retried one by one so a single bad input only
+    fails itself.
+
+    Args:
+        classifier: Hugging Face text-classification pipeline
+        texts: Texts to classify
+        max_length: Token limit, longer texts are truncated
+        bucket_size: Maximum number of texts per forward pass
+        timings: Optional dict accumulating seconds under ``"tokenise"``
+            and ``"forward"``
+
+    Returns:
+        list: Classification dict or exception per text, in input order
+    """
+    if not texts:
+        return []
+
+    started = time.perf_counter()
+
+    try:
+        encoded = classifier.tokenizer(texts, truncation=True, max_length=max_length)
+    except Exception as e:
+        logger.warning("Batch tokenisation failed, falling back to single inference: %s", e)
+        return [classify_single(classifier, text, max_length) for text in texts]
+
+    if timings is not None:
+        timings["tokenise"] = timings.get("tokenise", 0.0) + time.perf_counter() - started
+
+    order = sorted(range(len(texts)), key=lambda i: len(encoded["input_ids"][i]))
+    outputs = [None] * len(texts)
+
+    for start in range(0, len(order), bucket_size):
+        bucket = order[start:start + bucket_size]
+        try:
+            predictions = _forward(classifier, _split_encodings(encoded, bucket), timings)
+        except Exception as e:
+            logger.warning(
+                "Forward pass failed for bucket of %d texts, falling back to single inference: %s",
+                len(bucket), e
+            )
+            predictions = [classify_single(classifier, texts[i], max_length) for i in bucket]
+
+        for i, prediction in zip(bucket, predictions):
+            outputs[i] = prediction
+
+    return outputs
@@ -0,0 +1,179 @@
+"""In-process micro-batching for the synchronous classify endpoint"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from . import classifier as worker
+from .inference import DEFAULT_BUCKET_SIZE, DEFAULT_MAX_LENGTH
+from ..utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class MicroBatcher:
+    """Gathers concurrent classify requests into micro-batches
+
+    The model is loaded into the API process by the classifier worker's
+    initializer and batches go through ``_classify_batch_worker`` on a
+    single inference thread, so results match the queue path exactly. A
+    batch is closed when it holds ``max_batch_size`` messages or
+    ``max_wait_ms`` after its first message arrived. While a batch is in
+    inference the next one keeps gathering; once ``max_pending`` messages
+    are waiting, ``submit`` refuses new ones so callers can fall back to
+    the queue.
+
+    Args:
+        model_name: Hugging Face model identifier
+        device: Device the model runs on
+        backend: Inference backend, see ``backends.BACKENDS``
+        max_batch_size: Maximum messages per forward pass
+        max_wait_ms: Maximum time a batch waits to fill up
+        max_pending: Maximum messages waiting for inference
+        max_length: Token limit, longer texts are truncated
+        bucket_size: Maximum number of texts per padded forward pass
+    """
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        backend: str = "torch",
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5,
+        max_pending: int = 256,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        bucket_size: int = DEFAULT_BUCKET_SIZE,
+    ) -> None:
+        self.model_name = model_name
+        self.device = device
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_length = max_length
+        self.bucket_size = bucket_size
+        self._pending: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._executor: ThreadPoolExecutor | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Loads the model and starts the batching task
+
+        When the model fails to load the batcher stays stopped, so
+        ``submit`` returns ``None`` and requests go to the queue.
+        """
+        if self._task is not None:
+            return
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="classify")
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            worker._init_worker,
+            self.model_name,
+            self.device,
+            self.max_length,
+            0,
+            0,
+            self.backend
+        )
+
+        if worker._worker_init_error is not None:
+            logger.error(
+                "Micro-batcher disabled, classify requests will be queued: %s",
+                worker._worker_init_error
+            )
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            return
+
+        self._task = asyncio.create_task(self._run())
+        logger.info("Micro-batcher serving %s with %s backend", self.model_name, self.backend)
+
+    async def stop(self) -> None:
+        """Stops the batching task and releases pending requests"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while not self._pending.empty():
+            _, future = self._pending.get_nowait()
+            future.cancel()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def submit(self, message: dict) -> asyncio.Future | None:
+        """Queues a message for the next micro-batch
+
+        Returns:
+            asyncio.Future | None: Resolves to the message's result dict,
+            ``None`` when the batcher is saturated or not running
+        """
+        if self._task is None:
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._pending.put_nowait((message, future))
+        except asyncio.QueueFull:
+            return None
+
+        return future
+
+    async def _gather(self) -> list:
+        items = [await self._pending.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+
+        while len(items) < self.max_batch_size:
+            if not self._pending.empty():
+                items.append(self._pending.get_nowait())
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+
+            try:
+                items.append(await asyncio.wait_for(self._pending.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Requests whose caller went away are not worth a forward pass
+        return [(message, future) for message, future in items if not future.done()]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            items = await self._gather()
+            if not items:
+                continue
+
+            try:
+                results = await loop.run_in_executor(
+                    self._executor,
+                    worker._classify_batch_worker,
+                    [message for message, _ in items],
+                    self.model_name,
+                    self.device,
+                    self.max_length,
+                    self.bucket_size,
+                    None,
+                    self.backend
+                )
+            except asyncio.CancelledError:
+                for _, future in items:
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.exception("Micro-batch of %d messages failed: %s", len(items), e)
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
@@ -1,8 +1,143 @@
+from functools import lru_cache
+from enelvo import analytics, candidate_generation, candidate_scoring, metrics, preprocessing
 from enelvo.normaliser import Normaliser
 from ..utils import Config
 
-normaliser = Normaliser(
-    fc_list=Config.FORCE_LIST,
-    ig_list=Config.IGNORE_LIST,
-    sanitize=Config.SANITIZE
+
+class MemoNormaliser:
+    """Enelvo normaliser with bounded LRU memos per token and per text
+
+    Enelvo corrects every out-of-vocabulary token independently of its
+    context, so a token's correction can be reused across texts. The
+    correction logic mirrors ``Normaliser.normalise``.
+
+    Args:
+        normaliser: Configured Enelvo normaliser
+        token_cache_size: Maximum memoized token corrections
+        text_cache_size: Maximum memoized normalised texts
+    """
+    def __init__(self, normaliser: Normaliser, token_cache_size=50_000, text_cache_size=10_000):
+        self.normaliser = normaliser
+        self.correct_token = lru_cache(maxsize=token_cache_size)(self._correct_token)
+        self.normalise = lru_cache(maxsize=text_cache_size)(self._normalise)
+
+    def cache_info(self):
+        return {
+            "tokens": self.correct_token.cache_info(),
+            "texts": self.normalise.cache_info(),
+        }
+
+    def _normalise(self, sentence):
+        nrm = self.normaliser
+        tokens = preprocessing.tokenize(text=sentence, tokenizer=nrm.tokenizer)
+        oov_tokens = analytics.identify_oov(lex=nrm.ok_lex, force_list=nrm.fc_list, tokens=tokens)
+
+        for i in oov_tokens:
+            tokens[i] = self.correct_token(tokens[i])
+
+        return preprocessing.preprocess(
+            text=" ".join(tokens),
+            tokenizer=nrm.tokenizer,
+            pn_lex=nrm.pn_lex,
+            ac_lex=nrm.ac_lex,
+            capitalize_inis=nrm.capitalize_inis,
+            capitalize_pns=nrm.capitalize_pns,
+            capitalize_acs=nrm.capitalize_acs,
+            do_sanitize=nrm.sanitize,
+            as_string=True,
+        )
+
+    def _correct_token(self, token):
+        nrm = self.normaliser
+
+        if nrm.fc_list and token in nrm.fc_list:
+            return nrm.fc_list[token]
+        if token in nrm.in_lex:
+            return nrm.in_lex[token]
+        if not nrm.norm_lex:
+            return token
+        if token in nrm.norm_lex:
+            return max(nrm.norm_lex[token], key=lambda x: x[1])[0]
+
+        cands = candidate_generation.generate_by_similarity_metric(
+            lex=nrm.main_lex,
+            word=token,
+            threshold=nrm.threshold,
+            n_cands=nrm.n_cands,
+        )
+        best_cand = candidate_scoring.score_by_similarity_metrics(
+            candidates=cands,
+            metrics=[metrics.hassan_similarity],
+            reverse=True,
+            n_cands=1,
+        )
+        if best_cand[1]:
+            return best_cand[1][0][0]
+
+        nrm.logger.error('Failed to normalise word "' + token + '"!')
+        return token
+
+
+normaliser = MemoNormaliser(
+    Normaliser(
+        fc_list=Config.FORCE_LIST,
+        ig_list=Config.IGNORE_LIST,
+        sanitize=Config.SANITIZE
+    ),
+    token_cache_size=Config.NORMALISER_TOKEN_CACHE_SIZE,
+    text_cache_size=Config.NORMALISER_TEXT_CACHE_SIZE
 )
+
+
+def message_texts(batch):
+    """Validates a batch of queue messages and extracts their texts
+
+    Returns:
+        list: Text, or the validation exception, per message in input order
+    """
+    texts = [None] * len(batch)
+
+    for index, message in enumerate(batch):
+        if not isinstance(message, dict):
+            texts[index] = ValueError(
+                f"Invalid message format: expected dict, got {type(message).__name__}"
+            )
+            continue
+
+        text = message.get("msg", "")
+
+        if not isinstance(text, str) or not text.strip():
+            texts[index] = ValueError("Empty or missing 'msg' field in message")
+            continue
+
+        texts[index] = text
+
+    return texts
+
+
+def normalise_texts(texts):
+    """Normalises a batch of texts, passing through exceptions left by
+    ``message_texts``
+
+    Repeated texts are normalised once, and each distinct
+    out-of-vocabulary token of the batch is corrected once. A text that
+    fails to normalise gets its exception instead of failing the batch.
+
+    Module level so it can run in a separate normalisation process, which
+    then only receives and returns the texts.
+
+    Returns:
+        list: Normalised text, or the exception, per text in input order
+    """
+    normalised = {}
+
+    for text in texts:
+        if isinstance(text, Exception) or text in normalised:
+            continue
+        try:
+            normalised[text] = normaliser.normalise(text)
+        except Exception as e:
+            normalised[text] = e
+
+    return [text if isinstance(text, Exception) else normalised[text] for text in texts]
+
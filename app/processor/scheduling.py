@@ -0,0 +1,51 @@
+"""Weighted fair sharing of batch slots between input lanes"""
+
+
+class LaneScheduler:
+    """Splits batch slots between lanes by smooth weighted round-robin
+
+    For every slot each candidate lane earns its weight in credit and the
+    lane with the most credit takes the slot, paying back the candidates'
+    total weight. Credit carries over between batches, so while the same
+    lanes are backlogged each gets exactly ``weight`` of every ``total
+    weight`` consecutive slots, even when its share of one batch is below
+    a message. That bounds how long a low weight lane waits, whatever the
+    load on the others.
+
+    Lanes found empty have their credit reset, so an idle lane does not
+    bank slots and burst past its share when traffic comes back.
+
+    Args:
+        weights: Mapping of lane name to positive weight, in priority
+            order, which breaks credit ties
+    """
+    def __init__(self, weights: dict[str, int]) -> None:
+        if not weights or min(weights.values()) < 1:
+            raise ValueError("Expected at least one lane, all with positive weights")
+
+        self.weights = dict(weights)
+        self.lanes = tuple(weights)
+        self._credit = dict.fromkeys(self.lanes, 0)
+
+    def allocate(self, slots: int, lanes=None) -> dict[str, int]:
+        """Shares ``slots`` between ``lanes``, all lanes by default
+
+        Returns:
+            dict: Mapping of lane to slots, lanes without any left out
+        """
+        lanes = self.lanes if lanes is None else tuple(lanes)
+        total = sum(self.weights[lane] for lane in lanes)
+        shares = {}
+
+        for _ in range(slots if lanes else 0):
+            for lane in lanes:
+                self._credit[lane] += self.weights[lane]
+            chosen = max(lanes, key=self._credit.__getitem__)
+            self._credit[chosen] -= total
+            shares[chosen] = shares.get(chosen, 0) + 1
+
+        return shares
+
+    def idle(self, lane: str) -> None:
+        """Records that a lane ran out of messages"""
+        self._credit[lane] = 0
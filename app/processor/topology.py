@@ -0,0 +1,230 @@
+"""CPU layout of the classifier worker processes
+
+By default every worker lets torch, its BLAS library and the tokenizers
+library start one thread per visible core, so ``N`` workers run ``N``
+times more threads than there are cores and fight over them. A layout
+splits the CPU budget between the workers instead: each gets ``threads``
+intra-op, BLAS and tokenizer threads and, optionally, its own set of
+cores.
+
+The budget is the smaller of the CPUs the process may run on and the
+cgroup CPU quota, so a container limited to 4 CPUs on a 16 core node
+plans for 4. CPUs are ordered by socket and physical core, so a worker's
+core set keeps hyperthread siblings together and stays on one socket
+where it fits.
+"""
+import math
+import os
+from dataclasses import dataclass
+from ..utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_CGROUP_ROOT = "/sys/fs/cgroup"
+_SYSFS_CPU = "/sys/devices/system/cpu"
+
+
+@dataclass(frozen=True)
+class WorkerLayout:
+    """Threads and cores given to each worker of a pool
+
+    Attributes:
+        workers: Worker processes the layout was planned for
+        threads: Intra-op, BLAS and tokenizer threads per worker
+        inter_op_threads: Torch inter-op threads per worker
+        budget: CPUs shared between the workers
+        core_sets: CPUs each worker is pinned to, empty when not pinned
+    """
+    workers: int
+    threads: int
+    inter_op_threads: int
+    budget: int
+    core_sets: tuple = ()
+
+    def describe(self) -> str:
+        text = (
+            f"{self.workers} workers x {self.threads} threads "
+            f"({self.inter_op_threads} inter-op) on {self.budget} CPUs"
+        )
+        if self.core_sets:
+            text += ", pinned to " + " ".join(_format_cpus(cores) for cores in self.core_sets)
+        return text
+
+
+def cgroup_cpu_limit(root: str = _CGROUP_ROOT) -> float | None:
+    """Reads the cgroup CPU quota in CPUs, ``None`` when unlimited
+
+    Supports cgroup v2 (``cpu.max``) and v1 (``cpu.cfs_quota_us``).
+    """
+    try:
+        with open(os.path.join(root, "cpu.max"), encoding="utf-8") as limit_file:
+            quota, _, period = limit_file.read().strip().partition(" ")
+        return None if quota == "max" else int(quota) / int(period or 100000)
+    except (OSError, ValueError):
+        pass
+
+    for controller in ("cpu", "cpu,cpuacct"):
+        try:
+            with open(os.path.join(root, controller, "cpu.cfs_quota_us"), encoding="utf-8") as quota_file:
+                quota = int(quota_file.read())
+            with open(os.path.join(root, controller, "cpu.cfs_period_us"), encoding="utf-8") as period_file:
+                period = int(period_file.read())
+        except (OSError, ValueError):
+            continue
+        return None if quota <= 0 else quota / period
+
+    return None
+
+
+def available_cpus() -> list[int]:
+    """CPUs this process may run on, grouped by socket and physical core"""
+    try:
+        cpus = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = list(range(os.cpu_count() or 1))
+
+    def position(cpu):
+        try:
+            return (_read_topology(cpu, "physical_package_id"), _read_topology(cpu, "core_id"), cpu)
+        except (OSError, ValueError):
+            return (0, cpu, cpu)
+
+    return sorted(cpus, key=position)
+
+
+def _read_topology(cpu, name):
+    with open(os.path.join(_SYSFS_CPU, f"cpu{cpu}", "topology", name), encoding="utf-8") as topology_file:
+        return int(topology_file.read())
+
+
+def cpu_budget(cpus=None, cpu_limit=None) -> int:
+    """Whole CPUs available to the process, at least 1
+
+    Args:
+        cpus: Usable CPUs, detected by default
+        cpu_limit: CPU quota, read from the cgroup by default
+    """
+    cpus = available_cpus() if cpus is None else cpus
+    cpu_limit = cgroup_cpu_limit() if cpu_limit is None else cpu_limit
+    return max(1, min(len(cpus), math.floor(cpu_limit) if cpu_limit else len(cpus)))
+
+
+def plan_layout(workers: int, threads: int = 0, pin: bool = False, cpus=None, cpu_limit=None) -> WorkerLayout:
+    """Splits the CPU budget between ``workers`` processes
+
+    Args:
+        workers: Worker processes
+        threads: Threads per worker, 0 divides the budget evenly
+        pin: Gives each worker its own consecutive CPUs, shared round
+            robin when the workers need more than the budget
+        cpus: Usable CPUs, detected by default
+        cpu_limit: CPU quota, read from the cgroup by default
+
+    Returns:
+        WorkerLayout: The planned layout
+    """
+    cpus = available_cpus() if cpus is None else list(cpus)
+    budget = cpu_budget(cpus, cpu_limit)
+    workers = max(1, workers)
+    threads = threads or max(1, budget // workers)
+
+    if workers * threads > budget:
+        logger.warning(
+            "%d workers x %d threads oversubscribe the %d available CPUs",
+            workers, threads, budget
+        )
+
+    core_sets = ()
+    if pin:
+        usable = cpus[:max(budget, min(len(cpus), workers * threads))]
+        core_sets = tuple(
+            tuple(sorted({usable[(worker * threads + thread) % len(usable)] for thread in range(threads)}))
+            for worker in range(workers)
+        )
+
+    # Each worker runs one batch at a time, so parallelism goes into the operators
+    return WorkerLayout(workers, threads, 1, budget, core_sets)
+
+
+def layout_candidates(budget: int) -> list[tuple[int, int]]:
+    """Every ``(workers, threads)`` split using exactly ``budget`` CPUs"""
+    return [(workers, budget // workers) for workers in range(1, budget + 1) if budget % workers == 0]
+
+
+def claim_slot(owners) -> int:
+    """Claims the first slot of a pool not held by a live worker
+
+    Args:
+        owners: ``multiprocessing.Array`` of worker pids, one per slot,
+            shared by the workers of a pool; slots of exited workers are
+            reused by their replacements
+
+    Returns:
+        int: Index of the claimed slot
+    """
+    with owners.get_lock():
+        for slot, pid in enumerate(owners):
+            if pid == 0 or not _is_alive(pid):
+                owners[slot] = os.getpid()
+                return slot
+
+    # More live workers than slots, e.g. while a recycled pool drains
+    return os.getpid() % len(owners)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def apply_layout(layout: WorkerLayout, slot: int = 0) -> tuple:
+    """Applies a layout to the calling worker process
+
+    Sets the thread counts of torch, OpenMP / MKL and the tokenizers
+    library and, when the layout is pinned, the CPU affinity. Call it
+    before the model runs: torch only accepts the inter-op thread count
+    before its first parallel operation.
+
+    Returns:
+        tuple: CPUs the worker is pinned to, empty when not pinned
+    """
+    threads = str(layout.threads)
+    os.environ["OMP_NUM_THREADS"] = threads
+    os.environ["MKL_NUM_THREADS"] = threads
+    os.environ["RAYON_NUM_THREADS"] = threads
+    os.environ["TOKENIZERS_PARALLELISM"] = "true" if layout.threads > 1 else "false"
+
+    core_set = layout.core_sets[slot % len(layout.core_sets)] if layout.core_sets else ()
+    if core_set:
+        try:
+            os.sched_setaffinity(0, core_set)
+        except (AttributeError, OSError) as e:
+            logger.warning("Failed to pin worker %d to CPUs %s: %s", os.getpid(), _format_cpus(core_set), e)
+            core_set = ()
+
+    import torch
+
+    torch.set_num_threads(layout.threads)
+    try:
+        torch.set_num_interop_threads(layout.inter_op_threads)
+    except RuntimeError:
+        # Already started, e.g. inherited from a parent that ran torch
+        logger.debug("Keeping %d torch inter-op threads", torch.get_num_interop_threads())
+
+    return core_set
+
+
+def _format_cpus(cpus):
+    """Formats CPUs as a Linux CPU list, e.g. ``0-3,8``"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
@@ -1,2 +1,25 @@
 """Module responsible for storing Redis client instantiation"""
-from .client import get_async_client
+from .admission import AdmissionController, TokenBucket
+from .client import (
+    close_async_pool,
+    get_async_binary_client,
+    get_async_client,
+    get_client,
+    init_async_pool,
+)
+from .codec import CODECS, CodecError
+from .keys import (
+    ENQUEUED_TOTAL,
+    INPUT_QUEUE,
+    INPUT_STREAM,
+    MSG_INDEX,
+    RATE_LIMIT_PREFIX,
+    RESULT_CHANNEL,
+    RESULT_STREAM,
+    STREAM_GROUP,
+    STREAM_PAYLOAD_FIELD,
+    result_key,
+)
+from .lanes import DEFAULT_LANE, lane_key, parse_lanes
+from .stats import lane_depths, queue_depths
+from .waiter import ResultWaiter
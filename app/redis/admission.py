@@ -0,0 +1,159 @@
+"""Admission control for the enqueue endpoints"""
+import asyncio
+import math
+import time
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from .keys import ENQUEUED_TOTAL, INPUT_QUEUE, RATE_LIMIT_PREFIX
+from .lanes import DEFAULT_LANE
+from .stats import queue_depths
+from ..utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Refills the bucket for the time elapsed on the Redis clock, then takes
+# ARGV[3] tokens if available. A cost above the burst is admitted once the
+# bucket is full and leaves it in debt. Returns {allowed, seconds until
+# enough tokens}; the wait is a string because Lua numbers are truncated
+# to integers in replies.
+_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local needed = math.min(cost, burst)
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local last = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= needed then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (needed - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class TokenBucket:
+    """Per-client token bucket enforced atomically by a Redis script
+
+    Every API replica shares the buckets, stored under
+    ``ratelimit:<client>`` and expiring once they would be full again.
+
+    Args:
+        redis: Async Redis client
+        rate: Tokens added per second
+        burst: Bucket capacity
+    """
+    def __init__(self, redis: Redis, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._script = redis.register_script(_TOKEN_BUCKET)
+
+    async def take(self, client: str, cost: int = 1) -> float:
+        """Takes ``cost`` tokens from a client's bucket
+
+        The full cost is always charged. A cost above the burst waits for
+        a full bucket, then leaves it negative, so the client's next
+        requests wait until the debt is repaid. Redis errors let the
+        request through.
+
+        Returns:
+            float: 0 when admitted, else seconds until the tokens are available
+        """
+        try:
+            allowed, wait = await self._script(
+                keys=[f"{RATE_LIMIT_PREFIX}{client}"],
+                args=[self.rate, self.burst, cost]
+            )
+        except RedisError as e:
+            logger.warning("Rate limit check failed, admitting request: %s", e)
+            return 0.0
+
+        return 0.0 if int(allowed) else float(wait)
+
+
+class AdmissionController:
+    """Refuses new messages while the input backlog is above a high-water mark
+
+    The backlog and the global ``enqueued_total`` counter are read at
+    most once per ``refresh_interval`` seconds and shared by all requests
+    of the process. The drain rate is estimated from consecutive reads
+    as messages enqueued minus backlog growth, smoothed over time, and
+    turned into the ``Retry-After`` needed to get back under the mark.
+    When Redis cannot be read the last view is kept.
+
+    Args:
+        redis: Async Redis client
+        high_watermark: Backlog from which new messages are refused
+        refresh_interval: Seconds a backlog reading is reused
+        max_retry_after: Upper bound of the suggested retry delay, also
+            used while the drain rate is unknown
+        lanes: Lanes whose backlogs add up to the input backlog
+    """
+    SMOOTHING = 0.5
+
+    def __init__(
+        self,
+        redis: Redis,
+        high_watermark: int,
+        refresh_interval: float = 1.0,
+        max_retry_after: float = 60,
+        lanes: tuple = (DEFAULT_LANE,),
+    ) -> None:
+        self.redis = redis
+        self.high_watermark = high_watermark
+        self.refresh_interval = refresh_interval
+        self.max_retry_after = max_retry_after
+        self.lanes = tuple(lanes)
+        self.backlog = 0
+        self.drain_rate: float | None = None
+        self._enqueued: int | None = None
+        self._read_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def retry_after(self) -> float:
+        """Returns 0 when a message may be enqueued, else the seconds
+        the caller should wait before retrying"""
+        if time.monotonic() - self._read_at >= self.refresh_interval:
+            async with self._lock:
+                if time.monotonic() - self._read_at >= self.refresh_interval:
+                    await self._refresh()
+
+        if self.backlog < self.high_watermark:
+            return 0.0
+
+        if not self.drain_rate:
+            return self.max_retry_after
+
+        excess = self.backlog - self.high_watermark + 1
+        return min(self.max_retry_after, max(1.0, math.ceil(excess / self.drain_rate)))
+
+    async def _refresh(self) -> None:
+        now = time.monotonic()
+
+        try:
+            backlog = (await queue_depths(self.redis, queues=(), lanes=self.lanes))[INPUT_QUEUE]
+            enqueued = int(await self.redis.get(ENQUEUED_TOTAL) or 0)
+        except RedisError as e:
+            logger.warning("Failed to read the input backlog, keeping the last view: %s", e)
+            self._read_at = now
+            return
+
+        if self._enqueued is not None and now > self._read_at:
+            drained = (enqueued - self._enqueued) - (backlog - self.backlog)
+            rate = max(0.0, drained / (now - self._read_at))
+            self.drain_rate = rate if self.drain_rate is None else (
+                self.SMOOTHING * rate + (1 - self.SMOOTHING) * self.drain_rate
+            )
+
+        self.backlog = backlog
+        self._enqueued = enqueued
+        self._read_at = now
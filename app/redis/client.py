@@ -1,45 +1,99 @@
 from functools import lru_cache
 
-#from redis import Redis as SyncRedis
-from redis.asyncio import Redis
+from redis import Redis as SyncRedis
+from redis.asyncio import BlockingConnectionPool, Redis
 
 from ..utils import Config
 
 
-# @lru_cache(maxsize=None)
-# def get_client() -> Redis:
-#     """Generates a Redis client that is stored
-#     in cache, avoiding re-instantiation
-
-#     Returns:
-#         Redis: Redis client
-#     """
-#     return Redis(
-#         host=Config.REDIS_HOST,
-#         port=Config.REDIS_PORT,
-#         username=Config.REDIS_USER,
-#         password=Config.REDIS_PASSWORD if Config.REDIS_PASSWORD else None,
-#         decode_responses=Config.REDIS_DECODE_RESPONSES,
-#         socket_connect_timeout=5,
-#         retry_on_timeout=True,
-#         health_check_interval=30,
-#     )
+def _connection_kwargs() -> dict:
+    return {
+        "host": Config.REDIS_HOST,
+        "port": Config.REDIS_PORT,
+        "username": Config.REDIS_USER,
+        "password": Config.REDIS_PASSWORD if Config.REDIS_PASSWORD else None,
+        "decode_responses": Config.REDIS_DECODE_RESPONSES,
+        "encoding": "utf-8",
+        "encoding_errors": "strict",
+        "socket_connect_timeout": 5,
+        "retry_on_timeout": True,
+        "health_check_interval": 30,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_client() -> SyncRedis:
+    """Generates a synchronous Redis client that is stored
+    in cache, avoiding re-instantiation. Used from worker processes.
+
+    Returns:
+        Redis: Redis client
+    """
+    return SyncRedis(**_connection_kwargs())
+
+
+_async_pool: BlockingConnectionPool | None = None
+_async_client: Redis | None = None
+
+
+def init_async_pool(
+    max_connections: int = Config.REDIS_MAX_CONNECTIONS,
+    timeout: float = Config.REDIS_POOL_TIMEOUT
+) -> BlockingConnectionPool:
+    """Creates the process wide connection pool shared by every
+    client returned from ``get_async_client``
+
+    Args:
+        max_connections: Maximum number of open connections
+        timeout: Seconds to wait for a free connection before failing
+
+    Returns:
+        BlockingConnectionPool: The shared pool
+    """
+    global _async_pool, _async_client
+
+    if _async_pool is None:
+        _async_pool = BlockingConnectionPool(
+            max_connections=max_connections,
+            timeout=timeout,
+            **_connection_kwargs()
+        )
+        _async_client = Redis(connection_pool=_async_pool)
+
+    return _async_pool
+
+
+async def close_async_pool() -> None:
+    """Closes the shared client and disconnects every pooled connection"""
+    global _async_pool, _async_client
+
+    if _async_client is not None:
+        await _async_client.aclose(close_connection_pool=True)
+
+    _async_pool = None
+    _async_client = None
+
 
 async def get_async_client() -> Redis:
-    """Generates an async Redis client
+    """Returns an async Redis client
+
+    When ``init_async_pool`` has been called the shared pooled client is
+    returned, otherwise a standalone client is created.
+
+    Returns:
+        redis.Redis: Async Redis client
+    """
+    if _async_client is not None:
+        return _async_client
+
+    return Redis(**_connection_kwargs())
+
+
+async def get_async_binary_client() -> Redis:
+    """Returns a standalone async Redis client whose replies stay ``bytes``,
+    used to read queue payloads that may be binary (see ``codec``)
 
     Returns:
         redis.Redis: Async Redis client
     """
-    return Redis(
-        host=Config.REDIS_HOST,
-        port=Config.REDIS_PORT,
-        username=Config.REDIS_USER,
-        password=Config.REDIS_PASSWORD if Config.REDIS_PASSWORD else None,
-        decode_responses=Config.REDIS_DECODE_RESPONSES,
-        encoding="utf-8",
-        encoding_errors="strict",
-        socket_connect_timeout=5,
-        retry_on_timeout=True,
-        health_check_interval=30,
-    )
+    return Redis(**{**_connection_kwargs(), "decode_responses": False})
@@ -0,0 +1,82 @@
+"""Wire formats of the queue payloads
+
+Payloads are either JSON text or msgpack prefixed by a version byte.
+JSON always starts with ``{`` or ``[``, so ``decode`` tells the formats
+apart by their first byte and consumers read both while producers move
+from one to the other.
+
+JSON goes through orjson when it is installed, the standard library
+otherwise; msgpack needs the ``msgpack`` package (``pip install
+'.[codec]'``).
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+CODECS = ("json", "msgpack")
+
+MSGPACK_V1 = b"\x01"
+
+
+class CodecError(ValueError):
+    """Raised for payloads that cannot be decoded"""
+
+
+def dumps_json(value) -> bytes:
+    """Serializes to UTF-8 JSON, non-ASCII characters kept as is"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads_json(data):
+    """Parses JSON from ``str`` or UTF-8 ``bytes``"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode(value, codec: str = "json") -> bytes:
+    """Serializes a payload in the given format
+
+    Raises:
+        ValueError: If the codec is unknown or its package is missing
+        TypeError: If the value cannot be serialized
+    """
+    if codec == "json":
+        return dumps_json(value)
+
+    if codec == "msgpack":
+        if msgpack is None:
+            raise ValueError("The msgpack codec requires msgpack: pip install msgpack")
+        return MSGPACK_V1 + msgpack.packb(value, use_bin_type=True)
+
+    raise ValueError(f"Unknown codec {codec!r}, expected one of {CODECS}")
+
+
+def decode(data):
+    """Parses a payload written by ``encode`` in any format
+
+    Raises:
+        CodecError: If the payload is malformed or in an unknown format
+    """
+    if isinstance(data, (bytes, bytearray)) and data[:1] == MSGPACK_V1:
+        if msgpack is None:
+            raise CodecError("Received a msgpack payload but msgpack is not installed")
+        try:
+            return msgpack.unpackb(data[1:], raw=False)
+        except Exception as e:
+            raise CodecError(f"Invalid msgpack payload: {e}") from e
+
+    try:
+        return loads_json(data)
+    except (ValueError, TypeError) as e:
+        raise CodecError(f"Invalid JSON payload: {e}") from e
@@ -0,0 +1,19 @@
+"""Redis key names shared by the API and the classifier"""
+
+MSG_INDEX = "msg_index"
+RESULT_KEY_PREFIX = "result:"
+RESULT_CHANNEL = "result_ready"
+RESULT_STREAM = "norm_stream_results"
+
+INPUT_QUEUE = "norm_queue_in"
+INPUT_STREAM = "norm_stream_in"
+STREAM_GROUP = "classifiers"
+STREAM_PAYLOAD_FIELD = "data"
+
+ENQUEUED_TOTAL = "enqueued_total"
+RATE_LIMIT_PREFIX = "ratelimit:"
+
+
+def result_key(msg_id: str) -> str:
+    """Key of the hash holding the classification of a message"""
+    return f"{RESULT_KEY_PREFIX}{msg_id}"
@@ -0,0 +1,46 @@
+"""Priority lanes of the input transport
+
+Every lane is a separate input list and stream. The ``default`` lane
+keeps the historical ``norm_queue_in`` / ``norm_stream_in`` keys, other
+lanes append their name to them, e.g. ``norm_queue_in:bulk``.
+"""
+import re
+
+DEFAULT_LANE = "default"
+
+_LANE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def parse_lanes(spec: str) -> dict[str, int]:
+    """Parses a ``QUEUE_LANES`` value such as ``"high:8,default:2,bulk:1"``
+
+    The default lane is added with weight 1 when it is not listed.
+
+    Returns:
+        dict: Mapping of lane name to weight, highest weight first
+
+    Raises:
+        ValueError: If a lane name or weight is invalid
+    """
+    lanes = {}
+
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition(":")
+        name = name.strip()
+
+        if not _LANE_NAME.match(name):
+            raise ValueError(f"Invalid lane name {name!r} in {spec!r}")
+        try:
+            lanes[name] = int(weight or 1)
+        except ValueError as e:
+            raise ValueError(f"Invalid weight for lane {name!r} in {spec!r}") from e
+        if lanes[name] < 1:
+            raise ValueError(f"Lane {name!r} needs a positive weight, got {lanes[name]}")
+
+    lanes.setdefault(DEFAULT_LANE, 1)
+    return dict(sorted(lanes.items(), key=lambda lane: -lane[1]))
+
+
+def lane_key(base: str, lane: str) -> str:
+    """Key of a lane's input list or stream, ``base`` being the default lane's"""
+    return base if lane == DEFAULT_LANE else f"{base}:{lane}"
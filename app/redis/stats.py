@@ -0,0 +1,71 @@
+"""Cheap reads of queue depths for metrics and flow control"""
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from .keys import INPUT_QUEUE, INPUT_STREAM, STREAM_GROUP
+from .lanes import DEFAULT_LANE, lane_key
+
+
+def _read_lanes(pipe, lanes) -> None:
+    for lane in lanes:
+        pipe.llen(lane_key(INPUT_QUEUE, lane))
+        pipe.xinfo_groups(lane_key(INPUT_STREAM, lane))
+
+
+def _lane_depths(lanes, replies) -> dict:
+    """Adds up each lane's list length and, when its stream exists, the
+    entries of the ``classifiers`` group not yet delivered (lag) or not
+    yet acknowledged (pending)"""
+    depths = {}
+
+    for index, lane in enumerate(lanes):
+        length, groups = replies[2 * index:2 * index + 2]
+        depth = length if isinstance(length, int) else 0
+
+        if not isinstance(groups, ResponseError):
+            for group in groups:
+                if group.get("name") == STREAM_GROUP:
+                    depth += (group.get("lag") or 0) + (group.get("pending") or 0)
+
+        depths[lane] = depth
+
+    return depths
+
+
+async def queue_depths(
+    redis: Redis,
+    queues: tuple = ("norm_queue_out", "norm_queue_errors"),
+    lanes: tuple = (DEFAULT_LANE,)
+) -> dict:
+    """Reads the depth of the input transport and the given lists in one round trip
+
+    The ``norm_queue_in`` entry is the backlog of all the given lanes,
+    see ``lane_depths``.
+
+    Returns:
+        dict: Mapping of queue name to depth
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        _read_lanes(pipe, lanes)
+        for name in queues:
+            pipe.llen(name)
+        replies = await pipe.execute(raise_on_error=False)
+
+    depths = {INPUT_QUEUE: sum(_lane_depths(lanes, replies).values())}
+    for name, length in zip(queues, replies[2 * len(lanes):]):
+        depths[name] = length if isinstance(length, int) else 0
+
+    return depths
+
+
+async def lane_depths(redis: Redis, lanes: tuple = (DEFAULT_LANE,)) -> dict:
+    """Reads the backlog of each lane in one round trip: its list length
+    plus its stream group's lag and pending entries
+
+    Returns:
+        dict: Mapping of lane name to depth
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        _read_lanes(pipe, lanes)
+        replies = await pipe.execute(raise_on_error=False)
+
+    return _lane_depths(lanes, replies)
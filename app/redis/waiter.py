@@ -0,0 +1,116 @@
+"""Waits for classification results without polling"""
+import asyncio
+import json
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from .keys import RESULT_CHANNEL
+from ..utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResultWaiter:
+    """Multiplexes result notifications from a single pub/sub connection
+
+    The classifier publishes the ids of every batch it finishes on
+    ``RESULT_CHANNEL``; each pending wait is an asyncio future resolved by
+    the listener task, so waiting requests cost neither polling nor a
+    Redis connection each.
+    """
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self._waiters: dict[str, set[asyncio.Future]] = {}
+        self._next_batch: asyncio.Future | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Starts the listener task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stops the listener task and releases pending waits"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for futures in self._waiters.values():
+            for future in futures:
+                future.cancel()
+        self._waiters.clear()
+
+        if self._next_batch is not None:
+            self._next_batch.cancel()
+            self._next_batch = None
+
+    def register(self, msg_id: str) -> asyncio.Future:
+        """Registers interest in a message before its status is checked,
+        so a result published in between is not missed"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(msg_id, set()).add(future)
+        return future
+
+    def next_batch(self) -> asyncio.Future:
+        """Future resolved when the next batch of results is published,
+        whatever its ids, shared by every caller until then
+
+        Like ``register``, call it before reading, so a batch published in
+        between is not missed.
+        """
+        if self._next_batch is None or self._next_batch.done():
+            self._next_batch = asyncio.get_running_loop().create_future()
+        return self._next_batch
+
+    def unregister(self, msg_id: str, future: asyncio.Future) -> None:
+        futures = self._waiters.get(msg_id)
+        if futures is None:
+            return
+
+        futures.discard(future)
+        if not futures:
+            del self._waiters[msg_id]
+
+    async def wait(self, future: asyncio.Future, timeout: float) -> bool:
+        """Waits for a registered future
+
+        Returns:
+            bool: Whether the result was published before the timeout
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _notify(self, msg_ids) -> None:
+        if self._next_batch is not None and not self._next_batch.done():
+            self._next_batch.set_result(None)
+
+        for msg_id in msg_ids:
+            for future in self._waiters.pop(msg_id, ()):
+                if not future.done():
+                    future.set_result(None)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(RESULT_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        self._notify(json.loads(message["data"]))
+                    except (TypeError, ValueError) as e:
+                        logger.warning("Invalid result notification: %s", e)
+            except asyncio.CancelledError:
+                raise
+            except RedisError as e:
+                logger.error("Result notification listener error: %s", e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
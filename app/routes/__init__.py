@@ -1,45 +1,226 @@
 """Service routes module"""
 
 import json
+import math
+import re
+import time
 import uuid
 from redis.asyncio import Redis
 from redis.exceptions import RedisError
-from fastapi import APIRouter, Depends, HTTPException, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.status import (
     HTTP_202_ACCEPTED,
     HTTP_200_OK,
     HTTP_400_BAD_REQUEST,
     HTTP_500_INTERNAL_SERVER_ERROR,
-    HTTP_404_NOT_FOUND
+    HTTP_404_NOT_FOUND,
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_429_TOO_MANY_REQUESTS
+)
+from ..redis import codec
+from ..redis import (
+    DEFAULT_LANE,
+    ENQUEUED_TOTAL,
+    INPUT_QUEUE,
+    INPUT_STREAM,
+    MSG_INDEX,
+    RESULT_STREAM,
+    STREAM_PAYLOAD_FIELD,
+    AdmissionController,
+    ResultWaiter,
+    TokenBucket,
+    get_async_client,
+    lane_key,
+    parse_lanes,
+    result_key,
+)
+from ..utils import Config
+from ..utils.metrics import (
+    CLASSIFY_REQUESTS,
+    ENQUEUE_LATENCY,
+    ENQUEUED_MESSAGES,
+    REJECTED_REQUESTS,
+    RESULT_STREAM_CLIENTS,
 )
-from ..redis import get_async_client
 
 api = APIRouter()
 
+STATUS_MAP = {
+    "norm_queue_in": "pending",
+    "norm_queue_out": "completed",
+    "norm_queue_errors": "error"
+}
+
+LANES = parse_lanes(Config.QUEUE_LANES)
+
+# Result stream entry id, or "$" for entries published from now on
+_STREAM_CURSOR = re.compile(r"^(\$|\d+(-\d+)?)$")
+_STREAM_READ_COUNT = 500
+
+
+def _lane(value) -> str | None:
+    """Resolves a requested lane, ``None`` selecting the default one
+
+    Returns:
+        str | None: The lane, ``None`` when it is not a configured lane name
+    """
+    lane = DEFAULT_LANE if value is None else value
+    return lane if isinstance(lane, str) and lane in LANES else None
+
+
+def _unknown_lane(value) -> str:
+    return f"unknown lane {value!r}, expected one of {list(LANES)}"
+
+
+def _payload(msg_id: str, msg: str, lane: str = DEFAULT_LANE) -> bytes:
+    """Serializes a queue message in the ``QUEUE_CODEC`` format, stamped
+    with its enqueue time (epoch seconds) so the classifier can measure
+    end-to-end latency per lane"""
+    return codec.encode(
+        {"id": msg_id, "msg": msg, "lane": lane, "enqueued_at": time.time()},
+        Config.QUEUE_CODEC
+    )
+
+
+def _push_payloads(pipe, payloads: list, lane: str = DEFAULT_LANE) -> None:
+    """Queues payloads on the configured transport: one variadic RPUSH on
+    the lane's input list, or one capped XADD per payload on its stream"""
+    if Config.QUEUE_TRANSPORT == "stream":
+        for payload in payloads:
+            pipe.xadd(
+                lane_key(INPUT_STREAM, lane),
+                {STREAM_PAYLOAD_FIELD: payload},
+                maxlen=Config.STREAM_MAXLEN,
+                approximate=True
+            )
+    else:
+        pipe.rpush(lane_key(INPUT_QUEUE, lane), *payloads)
+
+    # Lets admission control tell the drain rate from the backlog growth
+    pipe.incrby(ENQUEUED_TOTAL, len(payloads))
+
+
+def get_result_waiter(request: Request) -> ResultWaiter | None:
+    """Returns the app wide result waiter, if the lifespan started one"""
+    return getattr(request.app.state, "result_waiter", None)
+
+
+def get_admission(request: Request) -> AdmissionController | None:
+    """Returns the backlog admission controller, if configured"""
+    return getattr(request.app.state, "admission", None)
+
+
+def get_rate_limiter(request: Request) -> TokenBucket | None:
+    """Returns the per-client rate limiter, if configured"""
+    return getattr(request.app.state, "rate_limiter", None)
+
+
+async def _admit(
+    request: Request,
+    admission: AdmissionController | None,
+    limiter: TokenBucket | None,
+    cost: int = 1
+) -> None:
+    """Applies the backlog limit and the per-client rate limit
+
+    The backlog is checked first, so a request it refuses does not
+    spend the client's tokens.
+
+    Args:
+        request: Incoming request, identifies the client
+        admission: Backlog admission controller, ``None`` to skip it
+        limiter: Per-client rate limiter, ``None`` to skip it
+        cost: Messages the request enqueues
+
+    Raises:
+        HTTPException: ``429`` with ``Retry-After`` when refused
+    """
+    if admission is not None:
+        wait = await admission.retry_after()
+        if wait:
+            REJECTED_REQUESTS.labels(reason="backlog").inc()
+            raise _too_many_requests("classification backlog is full", wait)
+
+    if limiter is not None:
+        client = request.headers.get(Config.RATE_LIMIT_CLIENT_HEADER) or (
+            request.client.host if request.client else "unknown"
+        )
+        wait = await limiter.take(client, cost)
+        if wait:
+            REJECTED_REQUESTS.labels(reason="rate_limited").inc()
+            raise _too_many_requests("rate limit exceeded", wait)
+
+
+def _too_many_requests(error: str, wait: float) -> HTTPException:
+    return HTTPException(
+        status_code=HTTP_429_TOO_MANY_REQUESTS,
+        detail={"error": error},
+        headers={"Retry-After": str(max(1, math.ceil(wait)))}
+    )
+
+
+def get_micro_batcher(request: Request):
+    """Returns the classify micro-batcher in model hosting mode, else ``None``"""
+    return getattr(request.app.state, "micro_batcher", None)
+
+
+async def _enqueue_message(redis: Redis, msg: str, lane: str = DEFAULT_LANE) -> str:
+    """Stores and queues a single message in one transaction
+
+    Returns:
+        str: The new message id
+    """
+    msg_id = str(uuid.uuid4())
+
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(msg_id, msg, ex=Config.MESSAGE_TTL_SECONDS)
+        _push_payloads(
+            pipe,
+            [_payload(msg_id, msg, lane)],
+            lane
+        )
+        pipe.hset(MSG_INDEX, msg_id, INPUT_QUEUE)
+        pipe.hexpire(MSG_INDEX, Config.MESSAGE_TTL_SECONDS, msg_id)
+        await pipe.execute()
+
+    return msg_id
+
 
 @api.post("/enqueue")
 async def do_enqueue(
+    http_request: Request,
     request: dict = Body(...),
-    redis:Redis=Depends(get_async_client)
+    redis:Redis=Depends(get_async_client),
+    admission: AdmissionController | None=Depends(get_admission),
+    limiter: TokenBucket | None=Depends(get_rate_limiter)
 ):
-    """Enqueues the message"""
+    """Enqueues the message on its ``lane``, the default one when omitted
+
+    Raises:
+        HTTPException: ``400`` if msg is missing or the lane unknown,
+            ``429`` when refused by admission control, ``500`` on Redis errors
+    """
+    started = time.perf_counter()
     msg = request.get("msg", "")
+    lane = _lane(request.get("lane"))
 
     if not msg.strip():
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST, detail={"error": "msg is required"}
         )
+    if lane is None:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail={"error": _unknown_lane(request.get("lane"))}
+        )
+
+    await _admit(http_request, admission, limiter)
 
     try:
-        msg_id = str(uuid.uuid4())
+        msg_id = await _enqueue_message(redis, msg, lane)
 
-        await redis.set(msg_id, msg)
-        await redis.rpush(
-            "norm_queue_in",
-            json.dumps({"id": msg_id, "msg": msg},ensure_ascii=False)
-        )
-        await redis.hset("msg_index", msg_id, "norm_queue_in")
+        ENQUEUED_MESSAGES.inc()
+        ENQUEUE_LATENCY.labels(endpoint="enqueue").observe(time.perf_counter() - started)
 
         return JSONResponse(
             status_code=HTTP_202_ACCEPTED,
@@ -52,26 +233,260 @@ async def do_enqueue(
             detail={"error": e}
         ) from e
 
+@api.post("/classify")
+async def do_classify(
+    http_request: Request,
+    request: dict = Body(...),
+    redis: Redis=Depends(get_async_client),
+    batcher=Depends(get_micro_batcher),
+    admission: AdmissionController | None=Depends(get_admission),
+    limiter: TokenBucket | None=Depends(get_rate_limiter)
+):
+    """Classifies a message inline
+
+    In model hosting mode (``CLASSIFY_ENABLED``) the message joins the
+    next in-process micro-batch and its classification is returned
+    directly. When the API does not host the model, its model failed to
+    load or the micro-batcher is saturated, the message is enqueued on its ``lane`` instead and a
+    ``202`` with its ``msg_id`` is returned, to be read through ``/dequeue``.
+
+    Returns:
+        JSON response with the classification, or the queued ``msg_id``
+
+    Raises:
+        HTTPException: If msg is missing, the request is refused by
+            admission control (the backlog limit only applies to the queue
+            fallback), classification fails or a Redis error occurs while
+            falling back to the queue
+    """
+    msg = request.get("msg", "")
+    lane = _lane(request.get("lane"))
+
+    if not isinstance(msg, str) or not msg.strip():
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail={"error": "msg is required"}
+        )
+    if lane is None:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail={"error": _unknown_lane(request.get("lane"))}
+        )
+
+    await _admit(http_request, None, limiter)
+
+    msg_id = str(uuid.uuid4())
+    future = batcher.submit({"id": msg_id, "msg": msg}) if batcher else None
+
+    if future is None:
+        await _admit(http_request, admission, None)
+
+        try:
+            msg_id = await _enqueue_message(redis, msg, lane)
+        except RedisError as e:
+            raise HTTPException(
+                status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={"error": str(e)}
+            ) from e
+
+        CLASSIFY_REQUESTS.labels(path="queue").inc()
+        ENQUEUED_MESSAGES.inc()
+
+        return JSONResponse(
+            status_code=HTTP_202_ACCEPTED,
+            content={"msg_id": msg_id, "queue": STATUS_MAP[INPUT_QUEUE]}
+        )
+
+    result = await future
+    CLASSIFY_REQUESTS.labels(path="inline").inc()
+
+    if result.get("status") != "classified":
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": result.get("error"), "error_type": result.get("error_type")}
+        )
+
+    return JSONResponse(
+        status_code=HTTP_200_OK,
+        content={
+            "msg_id": msg_id,
+            "result": {
+                "status": result["status"],
+                "classified_at": result["classified_at"],
+                **result["classification"]
+            }
+        }
+    )
+
+def _parse_batch_body(body: bytes, content_type: str) -> list:
+    """Parses a bulk enqueue body, either a JSON array or NDJSON
+
+    Lines of an NDJSON body that are not valid JSON are kept as their
+    ``JSONDecodeError`` so they surface as per-item errors instead of
+    failing the request.
+    """
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        try:
+            lines = body.decode("utf-8").splitlines()
+        except UnicodeDecodeError as e:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST, detail={"error": f"invalid UTF-8: {e}"}
+            ) from e
+
+        items = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                items.append(codec.loads_json(line))
+            except json.JSONDecodeError as e:
+                items.append(e)
+        return items
+
+    try:
+        items = codec.loads_json(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail={"error": f"invalid JSON: {e}"}
+        ) from e
+
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail={"error": "body must be a JSON array of messages"}
+        )
+
+    return items
+
+
+@api.post("/enqueue/batch")
+async def do_enqueue_batch(
+    request: Request,
+    lane: str = Query(DEFAULT_LANE),
+    redis:Redis=Depends(get_async_client),
+    admission: AdmissionController | None=Depends(get_admission),
+    limiter: TokenBucket | None=Depends(get_rate_limiter)
+):
+    """Enqueues many messages with a single Redis round trip
+
+    Accepts a JSON array of ``{"msg": ...}`` objects or an NDJSON body
+    (``Content-Type: application/x-ndjson``). Items go to the ``lane``
+    query parameter's lane unless they set their own, non-null ``lane``. Invalid
+    items are reported by index and do not prevent the valid ones from
+    being enqueued.
+
+    Admission control charges one rate limit token per valid message
+    and refuses the whole batch while the backlog is full.
+
+    Returns:
+        JSON response with one ``msg_id`` (or ``null``) per item and the
+        list of per-item errors
+    """
+    started = time.perf_counter()
+    items = _parse_batch_body(
+        await request.body(),
+        request.headers.get("content-type", "")
+    )
+
+    if len(items) > Config.ENQUEUE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail={"error": f"at most {Config.ENQUEUE_BATCH_MAX_ITEMS} messages per batch"}
+        )
+
+    if _lane(lane) is None:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail={"error": _unknown_lane(lane)}
+        )
+
+    msg_ids = [None] * len(items)
+    errors = []
+    raw_messages = {}
+    payloads = {}
+
+    for index, item in enumerate(items):
+        if isinstance(item, json.JSONDecodeError):
+            errors.append({"index": index, "error": f"invalid JSON: {item}"})
+            continue
+
+        msg = item.get("msg") if isinstance(item, dict) else None
+
+        if not isinstance(msg, str) or not msg.strip():
+            errors.append({"index": index, "error": "msg is required"})
+            continue
+
+        # A null lane means the batch's lane, like a missing one
+        requested_lane = item.get("lane")
+        item_lane = _lane(lane if requested_lane is None else requested_lane)
+        if item_lane is None:
+            errors.append({"index": index, "error": _unknown_lane(requested_lane)})
+            continue
+
+        msg_id = str(uuid.uuid4())
+        msg_ids[index] = msg_id
+        raw_messages[msg_id] = msg
+        payloads.setdefault(item_lane, []).append(_payload(msg_id, msg, item_lane))
+
+    if raw_messages:
+        await _admit(request, admission, limiter, cost=len(raw_messages))
+
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                for msg_id, msg in raw_messages.items():
+                    pipe.set(msg_id, msg, ex=Config.MESSAGE_TTL_SECONDS)
+                for item_lane, lane_payloads in payloads.items():
+                    _push_payloads(pipe, lane_payloads, item_lane)
+                pipe.hset(
+                    MSG_INDEX,
+                    mapping={msg_id: INPUT_QUEUE for msg_id in raw_messages}
+                )
+                pipe.hexpire(MSG_INDEX, Config.MESSAGE_TTL_SECONDS, *raw_messages)
+                await pipe.execute()
+
+        except RedisError as e:
+            raise HTTPException(
+                status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={"error": str(e)}
+            ) from e
+
+    ENQUEUED_MESSAGES.inc(len(raw_messages))
+    ENQUEUE_LATENCY.labels(endpoint="enqueue_batch").observe(time.perf_counter() - started)
+
+    return JSONResponse(
+        status_code=HTTP_202_ACCEPTED,
+        content={"msg_ids": msg_ids, "errors": errors}
+    )
+
 @api.get("/dequeue/{msg_id}")
 async def dequeue(
     msg_id,
-    redis: Redis=Depends(get_async_client)
+    wait: float = Query(0, ge=0),
+    redis: Redis=Depends(get_async_client),
+    waiter: ResultWaiter | None=Depends(get_result_waiter)
 ):
-    """Retrieves a message by its ID and returns its current status and queue location
-    
+    """Retrieves a message by its ID and returns its current status,
+    queue location and, once processed, its classification
+
     Args:
         msg_id: The UUID of the message to retrieve
+        wait: Seconds to hold the request open while the message is
+            pending, capped by ``DEQUEUE_MAX_WAIT_SECONDS``
         redis: Redis client dependency
+        waiter: Result notification dependency
         
     Returns:
-        JSON response with message details, queue location, and status
+        JSON response with message details, queue location, status and result
         
     Raises:
         HTTPException: If message not found or Redis error occurs
     """
+    wait = min(wait, Config.DEQUEUE_MAX_WAIT_SECONDS)
+    future = waiter.register(msg_id) if wait and waiter else None
 
     try:
-        queue = await redis.hget("msg_index", msg_id)
+        queue, result = await _read_status(redis, msg_id)
+
+        if future is not None and queue == INPUT_QUEUE:
+            if await waiter.wait(future, wait):
+                queue, result = await _read_status(redis, msg_id)
 
         if not queue:
             raise HTTPException(
@@ -79,20 +494,177 @@ async def dequeue(
                 detail={"error": f"{msg_id} not found"}
             )
 
-        status_map = {
-            "norm_queue_in": "pending",
-            "norm_queue_out": "completed",
-            "norm_queue_errors": "error"
-        }
-
         return JSONResponse(
             status_code=HTTP_200_OK,
-            content={
-                "msg_id": msg_id,
-                "queue": status_map.get(queue, "unknown")
-            }
+            content=_status_content(msg_id, queue, result)
         )
     except RedisError as e:
         raise HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail={"error": e}
         ) from e
+    finally:
+        if future is not None:
+            waiter.unregister(msg_id, future)
+
+
+@api.post("/dequeue/batch")
+async def dequeue_batch(
+    msg_ids: list[str] = Body(...),
+    redis: Redis=Depends(get_async_client)
+):
+    """Retrieves the status of many messages in a single Redis round trip
+
+    One ``HMGET`` on ``msg_index`` resolves every id, pipelined with the
+    reads of their result hashes.
+
+    Args:
+        msg_ids: JSON array of message ids, duplicates are answered once
+
+    Returns:
+        JSON response with the ``GET /dequeue/{msg_id}`` body of every
+        known message, in request order, and the ids not found
+    """
+    if len(msg_ids) > Config.DEQUEUE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail={"error": f"at most {Config.DEQUEUE_BATCH_MAX_ITEMS} ids per batch"}
+        )
+
+    msg_ids = list(dict.fromkeys(msg_ids))
+    results = []
+    not_found = []
+
+    if msg_ids:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hmget(MSG_INDEX, msg_ids)
+                for msg_id in msg_ids:
+                    pipe.hgetall(result_key(msg_id))
+                queues, *records = await pipe.execute()
+        except RedisError as e:
+            raise HTTPException(
+                status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail={"error": str(e)}
+            ) from e
+
+        for msg_id, queue, record in zip(msg_ids, queues, records):
+            if queue:
+                results.append(_status_content(msg_id, queue, record))
+            else:
+                not_found.append(msg_id)
+
+    return JSONResponse(
+        status_code=HTTP_200_OK,
+        content={"results": results, "not_found": not_found}
+    )
+
+
+@api.get("/results/stream")
+async def results_stream(
+    request: Request,
+    cursor: str | None = Query(None),
+    last_event_id: str | None = Header(None),
+    redis: Redis=Depends(get_async_client),
+    waiter: ResultWaiter | None=Depends(get_result_waiter)
+):
+    """Streams results as Server-Sent Events as the classifier publishes them
+
+    Every event carries a result payload, as pushed to ``norm_queue_out``
+    or ``norm_queue_errors``, and its result stream entry id. Clients
+    resume after an event by passing its id as ``cursor``, or as the
+    ``Last-Event-ID`` header that ``EventSource`` sends on reconnect;
+    resuming works as long as the entry is within the last
+    ``RESULT_STREAM_MAXLEN`` results. Without either, the stream starts
+    with the next result published, ``cursor=0`` replays all of them.
+
+    Idle streams wait on the result notifications instead of a blocking
+    read, so they hold no Redis connection, and send a comment every
+    ``RESULT_STREAM_KEEPALIVE_SECONDS``.
+
+    Raises:
+        HTTPException: If the cursor is malformed or Redis is unavailable
+    """
+    cursor = last_event_id or cursor or "$"
+
+    if not _STREAM_CURSOR.match(cursor):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail={"error": f"invalid cursor {cursor!r}, expected a stream entry id"}
+        )
+
+    if cursor == "$":
+        try:
+            latest = await redis.xrevrange(RESULT_STREAM, count=1)
+        except RedisError as e:
+            raise HTTPException(
+                status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail={"error": str(e)}
+            ) from e
+        cursor = latest[0][0] if latest else "0-0"
+
+    return StreamingResponse(
+        _result_events(request, redis, waiter, cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _result_events(request: Request, redis: Redis, waiter: ResultWaiter | None, cursor: str):
+    """Yields the result stream entries after ``cursor`` as SSE events
+
+    A Redis error ends the stream with an ``error`` event; the client
+    reconnects from the last id it received.
+    """
+    keepalive = Config.RESULT_STREAM_KEEPALIVE_SECONDS
+    RESULT_STREAM_CLIENTS.inc()
+
+    try:
+        while not await request.is_disconnected():
+            # Taken before reading, so a batch published in between wakes us up
+            future = waiter.next_batch() if waiter else None
+
+            try:
+                replies = await redis.xread(
+                    {RESULT_STREAM: cursor},
+                    count=_STREAM_READ_COUNT,
+                    block=None if future else int(keepalive * 1000)
+                )
+            except RedisError as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                return
+
+            entries = [entry for _, stream_entries in replies or [] for entry in stream_entries]
+            for entry_id, fields in entries:
+                yield f"id: {entry_id}\nevent: result\ndata: {fields[STREAM_PAYLOAD_FIELD]}\n\n"
+                cursor = entry_id
+
+            if entries:
+                continue
+
+            if future is None or not await waiter.wait(future, keepalive):
+                yield ": keepalive\n\n"
+    finally:
+        RESULT_STREAM_CLIENTS.dec()
+
+
+async def _read_status(redis: Redis, msg_id: str) -> tuple:
+    """Reads the index entry and result hash of a message in one round trip"""
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hget(MSG_INDEX, msg_id)
+        pipe.hgetall(result_key(msg_id))
+        queue, result = await pipe.execute()
+
+    return queue, result
+
+
+def _status_content(msg_id: str, queue: str, result: dict) -> dict:
+    """Builds the dequeue response body from the index entry and result hash"""
+    content = {
+        "msg_id": msg_id,
+        "queue": STATUS_MAP.get(queue, "unknown")
+    }
+
+    if result:
+        if "score" in result:
+            result["score"] = float(result["score"])
+        content["result"] = result
+
+    return content
@@ -0,0 +1,30 @@
+"""Prometheus scrape endpoint"""
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from fastapi import APIRouter, Depends, Response
+from ..redis import get_async_client, lane_depths, parse_lanes, queue_depths
+from ..utils import Config
+from ..utils.logging_config import get_logger
+from ..utils.metrics import LANE_DEPTH, QUEUE_DEPTH, render_latest
+
+logger = get_logger(__name__)
+
+metrics = APIRouter()
+
+_LANES = tuple(parse_lanes(Config.QUEUE_LANES))
+
+
+@metrics.get("/metrics", include_in_schema=False)
+async def get_metrics(redis: Redis=Depends(get_async_client)):
+    """Exposes the API metrics, refreshing queue depths at scrape time"""
+    try:
+        for queue, depth in (await queue_depths(redis, lanes=_LANES)).items():
+            QUEUE_DEPTH.labels(queue=queue).set(depth)
+        if len(_LANES) > 1:
+            for lane, depth in (await lane_depths(redis, _LANES)).items():
+                LANE_DEPTH.labels(lane=lane).set(depth)
+    except RedisError as e:
+        logger.warning("Failed to read queue depths: %s", e)
+
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
@@ -18,6 +18,8 @@ class Config:
         os.path.join(BASEDIR, "FORCE_LIST.txt")
     )
     SANITIZE: bool = os.getenv("ENELVO_SANITIZE", "true").lower() == "true"
+    NORMALISER_TOKEN_CACHE_SIZE: int = int(os.getenv("NORMALISER_TOKEN_CACHE_SIZE", "50000"))
+    NORMALISER_TEXT_CACHE_SIZE: int = int(os.getenv("NORMALISER_TEXT_CACHE_SIZE", "10000"))
 
     # Redis Configuration
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
@@ -25,9 +27,71 @@ class Config:
     REDIS_DECODE_RESPONSES: bool = True
     REDIS_USER: str = os.getenv("REDIS_USER", "default")
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+
+    # Transport Configuration: "list" (norm_queue_in) or "stream" (norm_stream_in)
+    QUEUE_TRANSPORT: str = os.getenv("QUEUE_TRANSPORT", "list")
+    STREAM_MAXLEN: int = int(os.getenv("STREAM_MAXLEN", "1000000"))
+    STREAM_CLAIM_IDLE_MS: int = int(os.getenv("STREAM_CLAIM_IDLE_MS", "60000"))
+    # Input payload format written by the API: "json" or "msgpack"; the
+    # classifier reads both
+    QUEUE_CODEC: str = os.getenv("QUEUE_CODEC", "json")
+    # Priority lanes as name:weight pairs, e.g. "high:8,default:2,bulk:1"
+    QUEUE_LANES: str = os.getenv("QUEUE_LANES", "default:1")
+
+    # Retention Configuration
+    MESSAGE_TTL_SECONDS: int = int(os.getenv("MESSAGE_TTL_SECONDS", "86400"))
+    RESULT_TTL_SECONDS: int = int(os.getenv("RESULT_TTL_SECONDS", "86400"))
+    # Approximate cap on the result stream read by GET /api/results/stream, 0 disables it
+    RESULT_STREAM_MAXLEN: int = int(os.getenv("RESULT_STREAM_MAXLEN", "100000"))
+    # Newest entries kept in norm_queue_out / norm_queue_errors, 0 keeps them all
+    RESULT_QUEUE_MAXLEN: int = int(os.getenv("RESULT_QUEUE_MAXLEN", "0"))
+
+    # API Configuration
+    ENQUEUE_BATCH_MAX_ITEMS: int = int(os.getenv("ENQUEUE_BATCH_MAX_ITEMS", "1000"))
+    DEQUEUE_MAX_WAIT_SECONDS: float = float(os.getenv("DEQUEUE_MAX_WAIT_SECONDS", "30"))
+    DEQUEUE_BATCH_MAX_ITEMS: int = int(os.getenv("DEQUEUE_BATCH_MAX_ITEMS", "1000"))
+    RESULT_STREAM_KEEPALIVE_SECONDS: float = float(os.getenv("RESULT_STREAM_KEEPALIVE_SECONDS", "15"))
+
+    # Admission Control Configuration: 0 disables the backlog limit / the rate limit
+    ADMISSION_HIGH_WATERMARK: int = int(os.getenv("ADMISSION_HIGH_WATERMARK", "0"))
+    ADMISSION_REFRESH_SECONDS: float = float(os.getenv("ADMISSION_REFRESH_SECONDS", "1"))
+    ADMISSION_MAX_RETRY_AFTER_SECONDS: float = float(os.getenv("ADMISSION_MAX_RETRY_AFTER_SECONDS", "60"))
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "100"))
+    RATE_LIMIT_CLIENT_HEADER: str = os.getenv("RATE_LIMIT_CLIENT_HEADER", "X-Client-Id")
+
+    # Model Hosting Configuration: serves POST /api/classify from the API process
+    CLASSIFY_ENABLED: bool = os.getenv("CLASSIFY_ENABLED", "false").lower() == "true"
+    CLASSIFY_MAX_BATCH_SIZE: int = int(os.getenv("CLASSIFY_MAX_BATCH_SIZE", "16"))
+    CLASSIFY_MAX_WAIT_MS: float = float(os.getenv("CLASSIFY_MAX_WAIT_MS", "5"))
+    CLASSIFY_MAX_PENDING: int = int(os.getenv("CLASSIFY_MAX_PENDING", "64"))
     
+    # Inference Configuration
+    MODEL_NAME: str = os.getenv("MODEL_NAME", "ruanchaves/bert-base-portuguese-cased-hatebr")
+    CLASSIFIER_DEVICE: str = os.getenv("CLASSIFIER_DEVICE", "cpu")
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "torch")
+    MAX_SEQ_LENGTH: int = int(os.getenv("MAX_SEQ_LENGTH", "512"))
+    INFERENCE_BUCKET_SIZE: int = int(os.getenv("INFERENCE_BUCKET_SIZE", "16"))
+    BACKEND_CACHE_DIR: str = os.getenv(
+        "BACKEND_CACHE_DIR",
+        os.path.join(
+            os.getenv("HF_HOME", os.path.join(os.path.expanduser("~"), ".cache", "huggingface")),
+            "normie"
+        )
+    )
+
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_DIR: str = os.path.join(PROJECT_ROOT, "logs")
     ENABLE_FILE_LOGGING: bool = os.getenv("ENABLE_FILE_LOGGING", "true").lower() == "true"
     ENABLE_CONSOLE_LOGGING: bool = os.getenv("ENABLE_CONSOLE_LOGGING", "true").lower() == "true"
+    # Hands records to a listener thread instead of writing on the event loop
+    LOG_ASYNC: bool = os.getenv("LOG_ASYNC", "false").lower() == "true"
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # "text" or "json" (one object per line)
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")
+    # Records per second per call site, 0 disables the limit
+    LOG_RATE_LIMIT_PER_SECOND: float = float(os.getenv("LOG_RATE_LIMIT_PER_SECOND", "0"))
+    LOG_RATE_LIMIT_BURST: int = int(os.getenv("LOG_RATE_LIMIT_BURST", "100"))
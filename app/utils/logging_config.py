@@ -1,9 +1,171 @@
+import atexit
+import copy
+import json
 import logging
 import logging.handlers
 import os
+import queue
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line
+
+    Values passed through ``extra`` (e.g. ``extra={"msg_id": ...}``) are
+    added as top-level fields.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "file": record.filename,
+            "line": record.lineno,
+            "process": record.process,
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry.setdefault(key, value)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site for records below ``CRITICAL``
+
+    Each ``logger.debug``/``error``/... line may emit ``burst`` records at
+    once and ``rate`` per second after that, so a storm of per-message
+    errors is cut down to a trickle instead of flooding the handlers. The
+    next record let through from a throttled call site reports how many
+    were suppressed. One filter may be shared by several handlers, a
+    record is only counted once.
+
+    Args:
+        rate: Records per second allowed per call site
+        burst: Records a call site may emit at once
+    """
+    def __init__(self, rate: float, burst: int) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.CRITICAL:
+            return True
+
+        admitted = getattr(record, "_rate_limit_admitted", None)
+        if admitted is not None:
+            return admitted
+
+        now = time.monotonic()
+        site = (record.pathname, record.lineno)
+
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(site, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            admitted = tokens >= 1
+
+            if admitted:
+                self._buckets[site] = (tokens - 1, now, 0)
+            else:
+                self._buckets[site] = (tokens, now, suppressed + 1)
+
+        if admitted and suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar records suppressed]"
+
+        record._rate_limit_admitted = admitted
+        return admitted
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the logging thread
+
+    Records are rendered here, so their arguments are not shared with the
+    listener thread, but exceptions are kept apart from the message for
+    the formatters. When the queue is full records are dropped and
+    counted, and the count is logged once there is room again.
+    """
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = record.exc_text or _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__,
+                    "pathname": __file__,
+                    "filename": os.path.basename(__file__),
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Dropped {self.dropped} log records, the logging queue was full",
+                }))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+def _stop_listener():
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _handle_directly_after_fork():
+    """Forked workers have no listener thread, so their root logger
+    writes to the listener's handlers itself"""
+    global _listener
+
+    if _listener is None:
+        return
+
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, _QueueHandler):
+            root_logger.removeHandler(handler)
+            for target in _listener.handlers:
+                root_logger.addHandler(target)
+
+    _listener = None
+
+
+atexit.register(_stop_listener)
+os.register_at_fork(after_in_child=_handle_directly_after_fork)
+
 
 def setup_logging(
     log_level: str = "INFO",
@@ -11,10 +173,19 @@ def setup_logging(
     enable_file_logging: bool = True,
     enable_console_logging: bool = True,
     max_bytes: int = 10_485_760,
-    backup_count: int = 5
+    backup_count: int = 5,
+    async_logging: bool = False,
+    json_format: bool = False,
+    rate_limit: float = 0,
+    rate_limit_burst: int = 100,
+    queue_size: int = 10_000
 ):
     """
     Configure centralized logging for the application.
+
+    With ``async_logging`` the root logger only puts records on a bounded
+    queue, and a listener thread does the console and file I/O and the
+    rotation, so logging from the event loop never waits on a disk.
     
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
@@ -23,7 +194,16 @@ def setup_logging(
         enable_console_logging: Whether to log to console
         max_bytes: Maximum size of each log file before rotation
         backup_count: Number of backup files to keep
+        async_logging: Whether to hand records to a listener thread
+        json_format: Whether to write one JSON object per record
+        rate_limit: Records per second allowed per call site, see
+            ``RateLimitFilter``; 0 disables the limit
+        rate_limit_burst: Records a call site may emit at once
+        queue_size: Records waiting for the listener thread before new
+            ones are dropped
     """
+    _stop_listener()
+
     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
     
     if log_dir is None:
@@ -40,6 +220,9 @@ def setup_logging(
         fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
+
+    if json_format:
+        detailed_format = console_format = JsonFormatter()
     
     root_logger = logging.getLogger()
     root_logger.setLevel(numeric_level)
@@ -74,6 +257,26 @@ def setup_logging(
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(detailed_format)
         root_logger.addHandler(error_handler)
+
+    handlers = list(root_logger.handlers)
+
+    if async_logging:
+        global _listener
+
+        root_logger.handlers.clear()
+        queue_handler = _QueueHandler(queue.Queue(maxsize=queue_size))
+        root_logger.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(
+            queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+        handlers = [queue_handler]
+
+    if rate_limit:
+        rate_limiter = RateLimitFilter(rate_limit, rate_limit_burst)
+        for handler in handlers:
+            handler.addFilter(rate_limiter)
     
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("transformers").setLevel(logging.WARNING)
@@ -0,0 +1,106 @@
+"""Prometheus metrics shared by the API and the classifier worker"""
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_END_TO_END_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+QUEUE_DEPTH = Gauge(
+    "normie_queue_depth",
+    "Number of entries waiting in a Redis queue",
+    ["queue"]
+)
+ENQUEUE_LATENCY = Histogram(
+    "normie_enqueue_latency_seconds",
+    "Time spent handling an enqueue request",
+    ["endpoint"],
+    buckets=_LATENCY_BUCKETS
+)
+ENQUEUED_MESSAGES = Counter(
+    "normie_enqueued_messages_total",
+    "Messages accepted by the API"
+)
+LANE_DEPTH = Gauge(
+    "normie_lane_depth",
+    "Number of messages waiting in an input lane",
+    ["lane"]
+)
+LANE_MESSAGES = Counter(
+    "normie_lane_messages_total",
+    "Messages fetched by the classifier from each input lane",
+    ["lane"]
+)
+RESULT_STREAM_CLIENTS = Gauge(
+    "normie_result_stream_clients",
+    "Clients connected to GET /api/results/stream"
+)
+REJECTED_REQUESTS = Counter(
+    "normie_rejected_requests_total",
+    "Requests refused by admission control",
+    ["reason"]
+)
+BATCH_SIZE = Histogram(
+    "normie_batch_size",
+    "Messages per classified batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+STAGE_LATENCY = Histogram(
+    "normie_stage_latency_seconds",
+    "Time a batch spends in each classifier stage",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS
+)
+END_TO_END_LATENCY = Histogram(
+    "normie_end_to_end_latency_seconds",
+    "Time from enqueue to published classification",
+    ["lane"],
+    buckets=_END_TO_END_BUCKETS
+)
+BATCH_SIZE_TARGET = Gauge(
+    "normie_batch_size_target",
+    "Batch size the classifier currently fetches"
+)
+ACTIVE_WORKERS = Gauge(
+    "normie_active_workers",
+    "Inference worker processes of the classifier"
+)
+AUTOSCALE_DECISIONS = Counter(
+    "normie_autoscale_decisions_total",
+    "Batch size and worker count changes made by the autoscaler",
+    ["action"]
+)
+CLASSIFY_REQUESTS = Counter(
+    "normie_classify_requests_total",
+    "Synchronous classify requests by the path that served them",
+    ["path"]
+)
+CACHE_LOOKUPS = Counter(
+    "normie_cache_lookups_total",
+    "Classification cache lookups by outcome",
+    ["result"]
+)
+CLASSIFIED_MESSAGES = Counter(
+    "normie_classified_messages_total",
+    "Messages published by the classifier",
+    ["status"]
+)
+
+
+def start_metrics_server(port: int) -> None:
+    """Starts the Prometheus listener of the classifier worker"""
+    start_http_server(port)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Renders the default registry in the Prometheus text format
+
+    Returns:
+        tuple: (body, content type)
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,72 @@
+"""Bulk classification startup script
+
+Classifies a JSONL, CSV or Parquet file without going through the API or
+Redis, e.g. to backfill or re-score historical messages after a model
+change. Rerunning an interrupted command resumes from its checkpoint.
+
+    python run_bulk.py messages.parquet scores.jsonl --text-column body --id-column id
+"""
+import argparse
+import os
+from app.processor.backends import BACKENDS
+from app.processor.bulk import INPUT_FORMATS, OUTPUT_FORMATS, classify_file
+from app.utils.logging_config import setup_logging, get_logger
+
+logger = get_logger(__name__)
+
+
+def main():
+    """Main entry point for bulk classification"""
+    parser = argparse.ArgumentParser(description="Classify a file without Redis")
+    parser.add_argument("input", help="JSONL, CSV or Parquet file")
+    parser.add_argument("output", help="JSONL or CSV file receiving one result per input row")
+    parser.add_argument("--text-column", default="msg")
+    parser.add_argument("--id-column", help="Column copied to the result id, defaults to the row number")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS)
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows read at a time")
+    parser.add_argument("--checkpoint-every", type=int, help="Rows between checkpoints, defaults to --chunk-size")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("BATCH_SIZE", "64")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("NUM_WORKERS", "2")))
+    parser.add_argument("--model", default=os.getenv("MODEL_NAME", "ruanchaves/bert-base-portuguese-cased-hatebr"))
+    parser.add_argument("--device", default=os.getenv("CLASSIFIER_DEVICE", "cpu"))
+    parser.add_argument("--backend", choices=BACKENDS, default=os.getenv("INFERENCE_BACKEND", "torch"))
+    parser.add_argument("--max-length", type=int, default=int(os.getenv("MAX_SEQ_LENGTH", "512")))
+    parser.add_argument("--bucket-size", type=int, default=int(os.getenv("INFERENCE_BUCKET_SIZE", "16")))
+    parser.add_argument("--share-weights", action="store_true",
+                        default=os.getenv("SHARE_MODEL_WEIGHTS", "false").lower() == "true",
+                        help="Fork workers sharing one copy of the model weights")
+    args = parser.parse_args()
+
+    setup_logging(
+        log_level=os.getenv("LOG_LEVEL", "INFO"),
+        enable_file_logging=False,
+        enable_console_logging=True
+    )
+
+    logger.info(f"Classifying {args.input} into {args.output}")
+    logger.info(f"Model: {args.model} ({args.backend} on {args.device})")
+    logger.info(f"Workers: {args.workers}, batch size: {args.batch_size}, chunk size: {args.chunk_size}")
+
+    classify_file(
+        args.input,
+        args.output,
+        text_column=args.text_column,
+        id_column=args.id_column,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        model_name=args.model,
+        device=args.device,
+        backend=args.backend,
+        max_length=args.max_length,
+        bucket_size=args.bucket_size,
+        share_weights=args.share_weights,
+        checkpoint_every=args.checkpoint_every
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 """Classifier worker startup script"""
 import asyncio
 import os
+from app.processor.autoscale import Autoscaler
 from app.processor.classifier import BERTClassifier
+from app.processor.topology import cgroup_cpu_limit, cpu_budget
+from app.redis import parse_lanes
+from app.utils import Config
 from app.utils.logging_config import setup_logging, get_logger
+from app.utils.metrics import start_metrics_server
 
 logger = get_logger(__name__)
 
@@ -15,7 +20,12 @@ async def main():
         log_level=os.getenv("LOG_LEVEL", "INFO"),
         log_dir="/app/logs",
         enable_file_logging=os.getenv("ENABLE_FILE_LOGGING", "true").lower() == "true",
-        enable_console_logging=True
+        enable_console_logging=True,
+        async_logging=os.getenv("LOG_ASYNC", "false").lower() == "true",
+        json_format=os.getenv("LOG_FORMAT", "text") == "json",
+        rate_limit=float(os.getenv("LOG_RATE_LIMIT_PER_SECOND", "0")),
+        rate_limit_burst=int(os.getenv("LOG_RATE_LIMIT_BURST", "100")),
+        queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000"))
     )
     
     # Get configuration from environment variables
@@ -24,21 +34,93 @@ async def main():
         "MODEL_NAME", 
         "ruanchaves/bert-base-portuguese-cased-hatebr"
     )
+    backend = os.getenv("INFERENCE_BACKEND", "torch")
     num_workers = int(os.getenv("NUM_WORKERS", "2"))
     batch_size = int(os.getenv("BATCH_SIZE", "8"))
+    max_wait_ms = float(os.getenv("MAX_BATCH_WAIT_MS", "0"))
+    max_length = int(os.getenv("MAX_SEQ_LENGTH", "512"))
+    bucket_size = int(os.getenv("INFERENCE_BUCKET_SIZE", "16"))
+    cache_size = int(os.getenv("CLASSIFICATION_CACHE_SIZE", "10000"))
+    cache_ttl = int(os.getenv("CLASSIFICATION_CACHE_TTL_SECONDS", "86400"))
+    normaliser_workers = int(os.getenv("NORMALISER_WORKERS", "0"))
+    max_batches_per_worker = int(os.getenv("WORKER_MAX_BATCHES", "0")) or None
+    max_rss_growth_mb = float(os.getenv("WORKER_MAX_RSS_GROWTH_MB", "0")) or None
+    share_weights = os.getenv("SHARE_MODEL_WEIGHTS", "false").lower() == "true"
+    adaptive_batching = os.getenv("ADAPTIVE_BATCHING", "false").lower() == "true"
+    cpu_layout = os.getenv("WORKER_CPU_LAYOUT", "false").lower() == "true"
+    threads_per_worker = int(os.getenv("WORKER_THREADS", "0"))
+    pin_workers = os.getenv("WORKER_PIN_CPUS", "false").lower() == "true"
     
+    metrics_port = int(os.getenv("METRICS_PORT", "9100"))
+    lanes = parse_lanes(Config.QUEUE_LANES)
+
+    autoscaler = None
+    if adaptive_batching:
+        autoscaler = Autoscaler(
+            min_batch_size=int(os.getenv("MIN_BATCH_SIZE", "1")),
+            max_batch_size=int(os.getenv("MAX_BATCH_SIZE", "64")),
+            min_workers=int(os.getenv("MIN_WORKERS", str(num_workers))),
+            max_workers=int(os.getenv("MAX_WORKERS", str(num_workers))),
+            target_latency_ms=float(os.getenv("TARGET_BATCH_LATENCY_MS", "500")),
+            interval=float(os.getenv("AUTOSCALE_INTERVAL_SECONDS", "5")),
+            worker_cooldown=float(os.getenv("AUTOSCALE_WORKER_COOLDOWN_SECONDS", "60"))
+        )
+
     logger.info("Starting BERT Classifier worker")
     logger.info(f"Device: {device}")
     logger.info(f"Model: {model_name}")
-    logger.info(f"Workers: {num_workers}")
+    logger.info(f"Backend: {backend}")
+    logger.info(f"Transport: {Config.QUEUE_TRANSPORT}")
+    logger.info(f"Lanes: {', '.join(f'{lane} (weight {weight})' for lane, weight in lanes.items())}")
+    logger.info(f"Workers: {num_workers}{' (shared model weights)' if share_weights else ''}")
     logger.info(f"Batch size: {batch_size}")
+    logger.info(f"Max batch wait: {max_wait_ms} ms")
+    logger.info(f"Max sequence length: {max_length}, bucket size: {bucket_size}")
+    logger.info(f"Classification cache: {cache_size} local entries, Redis TTL {cache_ttl} s")
+    logger.info(f"Normaliser stage processes: {normaliser_workers or 'inline'}")
+    logger.info(f"Worker recycling: every {max_batches_per_worker or 'unlimited'} batches, "
+                f"RSS growth limit {max_rss_growth_mb or 'unlimited'} MB")
+    if cpu_layout:
+        cpu_limit = cgroup_cpu_limit()
+        logger.info(f"CPU layout: {cpu_budget()} CPUs (cgroup quota {cpu_limit or 'unlimited'}) split "
+                    f"between workers, {threads_per_worker or 'even share of'} threads per worker"
+                    f"{', pinned' if pin_workers else ''}")
+    if autoscaler:
+        logger.info(f"Adaptive batching: batch size {autoscaler.min_batch_size}-{autoscaler.max_batch_size}, "
+                    f"workers {autoscaler.min_workers}-{autoscaler.max_workers}, "
+                    f"target batch latency {autoscaler.target_latency * 1000:.0f} ms")
     
     classifier = BERTClassifier(
         device=device,
         model_name=model_name,
         num_workers=num_workers,
-        batch_size=batch_size
+        batch_size=batch_size,
+        max_wait_ms=max_wait_ms,
+        max_batches_per_worker=max_batches_per_worker,
+        max_rss_growth_mb=max_rss_growth_mb,
+        max_length=max_length,
+        bucket_size=bucket_size,
+        result_ttl=Config.RESULT_TTL_SECONDS,
+        result_stream_maxlen=Config.RESULT_STREAM_MAXLEN,
+        result_queue_maxlen=Config.RESULT_QUEUE_MAXLEN,
+        cache_size=cache_size,
+        cache_ttl=cache_ttl,
+        normaliser_workers=normaliser_workers,
+        backend=backend,
+        transport=Config.QUEUE_TRANSPORT,
+        stream_claim_idle_ms=Config.STREAM_CLAIM_IDLE_MS,
+        queue_monitor_interval=5 if metrics_port else 0,
+        autoscaler=autoscaler,
+        share_weights=share_weights,
+        lanes=lanes,
+        cpu_layout=cpu_layout,
+        threads_per_worker=threads_per_worker,
+        pin_workers=pin_workers
     )
+
+    if metrics_port:
+        start_metrics_server(metrics_port)
+        logger.info(f"Metrics listening on port {metrics_port}")
     
     try:
         await classifier.initialize()
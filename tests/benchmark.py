@@ -0,0 +1,448 @@
+"""Offline benchmark of the classifier pipeline
+
+Drives the normaliser, ``_classify_batch_worker`` and a full
+``BERTClassifier`` consumer against fakeredis (``pip install 'normie[bench]'``)
+or a scratch Redis database, without the Docker stack. Every configuration
+runs in a fresh process so its peak RSS is its own.
+
+    python -m tests.benchmark --modes normaliser,worker,pipeline \\
+        --batch-sizes 8,32 --workers 1,2 --output bench.json
+    python -m tests.benchmark --baseline bench.json
+    python -m tests.benchmark --modes pipeline --sweep --pin
+
+Modes:
+    normaliser: ``normalise_texts`` per batch, memo caches cleared first
+    worker: ``_classify_batch_worker`` in-process, model loaded beforehand
+    pipeline: enqueue, consume and publish through ``BERTClassifier``
+
+``--threads`` runs the worker and pipeline modes with a CPU layout of that
+many threads per worker, see ``app.processor.topology``. ``--sweep`` runs
+the pipeline mode with every workers x threads split of the CPU budget
+and reports the fastest split per batch size and backend.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PHRASES = os.path.join(PROJECT_ROOT, "tests", "test_phrases.json")
+DEFAULT_MODEL = "ruanchaves/bert-base-portuguese-cased-hatebr"
+MODES = ("normaliser", "worker", "pipeline")
+
+
+def build_corpus(kind, size, phrases_path=DEFAULT_PHRASES, min_words=5, max_words=30, seed=0):
+    """Builds the benchmark texts
+
+    ``phrases`` cycles ``test_phrases.json``, so texts repeat and exercise
+    in-batch deduplication. ``synthetic`` samples words of the phrases into
+    texts of ``min_words`` to ``max_words`` words, which are practically
+    all distinct.
+    """
+    with open(phrases_path, encoding="utf-8") as phrases_file:
+        phrases = [phrase for group in json.load(phrases_file).values() for phrase in group]
+
+    if kind == "phrases":
+        return list(itertools.islice(itertools.cycle(phrases), size))
+
+    rng = random.Random(seed)
+    vocabulary = [word for phrase in phrases for word in phrase.split()]
+    return [
+        " ".join(rng.choices(vocabulary, k=rng.randint(min_words, max_words)))
+        for _ in range(size)
+    ]
+
+
+def _batches(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile, ``None`` for an empty sample"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def _peak_rss_mb(who):
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _bench_normaliser(config, texts):
+    from app.processor.normaliser import message_texts, normalise_texts, normaliser
+
+    normaliser.normalise.cache_clear()
+    normaliser.correct_token.cache_clear()
+
+    latencies = []
+    for batch in _batches([{"id": str(i), "msg": text} for i, text in enumerate(texts)], config["batch_size"]):
+        started = time.perf_counter()
+        normalise_texts(message_texts(batch))
+        latencies.append(time.perf_counter() - started)
+
+    info = normaliser.cache_info()
+    return latencies, sum(latencies), {
+        "token_cache_hits": info["tokens"].hits,
+        "token_cache_misses": info["tokens"].misses,
+    }
+
+
+def _bench_worker(config, texts):
+    from app.processor import classifier
+    from app.processor.topology import plan_layout
+
+    layout = plan_layout(1, config["threads"], config["pin"]) if config["threads"] else None
+    classifier._init_worker(
+        config["model"], config["device"], config["max_length"], backend=config["backend"], layout=layout
+    )
+
+    latencies = []
+    for batch in _batches([{"id": str(i), "msg": text} for i, text in enumerate(texts)], config["batch_size"]):
+        started = time.perf_counter()
+        classifier._classify_batch_worker(
+            batch,
+            config["model"],
+            config["device"],
+            config["max_length"],
+            config["bucket_size"],
+            backend=config["backend"]
+        )
+        latencies.append(time.perf_counter() - started)
+
+    return latencies, sum(latencies), {}
+
+
+async def _bench_pipeline(config, texts):
+    from app.processor.classifier import BERTClassifier
+    from app.redis import INPUT_STREAM, STREAM_PAYLOAD_FIELD, codec
+
+    class TimedClassifier(BERTClassifier):
+        """Records the time each batch takes from decode to publish"""
+        async def _decode_batch(self, entries):
+            batch = await super()._decode_batch(entries)
+            batch.decoded_at = time.perf_counter()
+            return batch
+
+        async def _publish_batch(self, batch):
+            await super()._publish_batch(batch)
+            self.latencies.append(time.perf_counter() - batch.decoded_at)
+
+    if config["redis_url"]:
+        from redis.asyncio import from_url
+        redis = from_url(config["redis_url"], decode_responses=True)
+        input_redis = from_url(config["redis_url"])
+    else:
+        try:
+            from fakeredis import FakeAsyncRedis
+        except ImportError as e:
+            raise RuntimeError(
+                "The pipeline mode needs fakeredis or --redis-url: pip install 'normie[bench]'"
+            ) from e
+        from fakeredis import FakeServer
+        server = FakeServer()
+        redis = FakeAsyncRedis(server=server, decode_responses=True)
+        input_redis = FakeAsyncRedis(server=server)
+
+    consumer = TimedClassifier(
+        model_name=config["model"],
+        num_workers=config["workers"],
+        batch_size=config["batch_size"],
+        poll_timeout=1,
+        device=config["device"],
+        max_length=config["max_length"],
+        bucket_size=config["bucket_size"],
+        backend=config["backend"],
+        transport=config["transport"],
+        cpu_layout=config["threads"] is not None,
+        threads_per_worker=config["threads"] or 0,
+        pin_workers=config["pin"],
+    )
+    consumer.latencies = []
+    await redis.delete(consumer.input_queue, consumer.output_queue, consumer.error_queue, INPUT_STREAM)
+    consumer.redis_client = redis
+    consumer.input_client = input_redis
+    if consumer.transport == "stream":
+        await consumer._ensure_stream_group()
+
+    async def enqueue(prefix, batch_texts):
+        async with redis.pipeline(transaction=False) as pipe:
+            for i, text in enumerate(batch_texts):
+                payload = codec.encode(
+                    {"id": f"{prefix}-{i}", "msg": text, "enqueued_at": time.time()},
+                    config["codec"]
+                )
+                if consumer.transport == "stream":
+                    pipe.xadd(INPUT_STREAM, {STREAM_PAYLOAD_FIELD: payload})
+                else:
+                    pipe.lpush(consumer.input_queue, payload)
+            await pipe.execute()
+
+    async def wait_published(total):
+        deadline = time.monotonic() + config["timeout"]
+        while time.monotonic() < deadline:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.llen(consumer.output_queue).llen(consumer.error_queue)
+                classified, errors = await pipe.execute()
+            if classified + errors >= total:
+                return errors
+            await asyncio.sleep(0.01)
+        raise TimeoutError(f"Only {classified + errors}/{total} messages published")
+
+    # Warm-up batches load the model in every worker before timing starts
+    warmup = texts[:config["batch_size"] * config["workers"]]
+    consuming = asyncio.create_task(consumer.start_consuming())
+    try:
+        await enqueue("warmup", warmup)
+        warmup_errors = await wait_published(len(warmup))
+        consumer.latencies.clear()
+
+        started = time.perf_counter()
+        await enqueue("bench", texts)
+        errors = await wait_published(len(warmup) + len(texts))
+        elapsed = time.perf_counter() - started
+    finally:
+        consumer._running = False
+        await asyncio.wait_for(consuming, config["timeout"])
+        await redis.aclose()
+        await input_redis.aclose()
+
+    return consumer.latencies, elapsed, {"errors": errors - warmup_errors}
+
+
+def run_config(config, texts):
+    """Runs one configuration and returns its result record
+
+    Meant to run in a fresh process, see ``main``.
+    """
+    logging.basicConfig(level=logging.WARNING)
+
+    if config["mode"] == "normaliser":
+        latencies, elapsed, extra = _bench_normaliser(config, texts)
+    elif config["mode"] == "worker":
+        latencies, elapsed, extra = _bench_worker(config, texts)
+    else:
+        latencies, elapsed, extra = asyncio.run(_bench_pipeline(config, texts))
+
+    return {
+        "config": {
+            key: config[key]
+            for key in ("mode", "batch_size", "workers", "threads", "pin", "backend", "transport", "codec")
+        },
+        "messages": len(texts),
+        "seconds": elapsed,
+        "msgs_per_s": len(texts) / elapsed if elapsed else None,
+        "batch_latency_s": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+        },
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_worker_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        **extra,
+    }
+
+
+def _layouts(args, mode, budget):
+    """``(workers, threads)`` pairs to run a mode with, ``threads`` being
+    ``None`` without a CPU layout"""
+    if mode == "normaliser":
+        return [(1, None)]
+    if mode == "worker":
+        return [(1, threads) for threads in args.threads or [None]]
+    if args.sweep:
+        from app.processor.topology import layout_candidates
+        return layout_candidates(budget)
+    return list(itertools.product(args.workers, args.threads or [None]))
+
+
+def _configs(args, budget):
+    for mode, batch_size, backend in itertools.product(args.modes, args.batch_sizes, args.backends):
+        if mode == "normaliser" and backend != args.backends[0]:
+            continue
+        for workers, threads in _layouts(args, mode, budget):
+            yield {
+                "mode": mode,
+                "batch_size": batch_size,
+                "workers": workers,
+                "threads": threads,
+                "pin": args.pin if threads else None,
+                "backend": None if mode == "normaliser" else backend,
+                "transport": args.transport if mode == "pipeline" else None,
+                "codec": args.codec if mode == "pipeline" else None,
+                "model": args.model,
+                "device": args.device,
+                "max_length": args.max_length,
+                "bucket_size": args.bucket_size,
+                "redis_url": args.redis_url,
+                "timeout": args.timeout,
+            }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _config_key(config):
+    # Reports written before the codec option ran JSON pipelines
+    codec = config.get("codec") or ("json" if config.get("mode") == "pipeline" else None)
+    return (
+        *(config.get(key) for key in ("mode", "batch_size", "workers", "threads", "backend", "transport")),
+        codec,
+        bool(config.get("pin"))
+    )
+
+
+def compare(results, baseline):
+    """Prints the throughput change of each configuration against a baseline report"""
+    previous = {_config_key(result["config"]): result for result in baseline["results"]}
+
+    for result in results:
+        before = previous.get(_config_key(result["config"]))
+        if not before or not before["msgs_per_s"] or not result["msgs_per_s"]:
+            continue
+        change = (result["msgs_per_s"] / before["msgs_per_s"] - 1) * 100
+        print(
+            f"{_format_config(result['config'])}: {before['msgs_per_s']:.1f} -> "
+            f"{result['msgs_per_s']:.1f} msgs/s ({change:+.1f}%) vs {baseline.get('commit')}"
+        )
+
+
+def report_best_layouts(results):
+    """Prints the fastest workers x threads split of each pipeline batch size and backend"""
+    best = {}
+    for result in results:
+        config = result["config"]
+        if config["mode"] != "pipeline" or not result["msgs_per_s"]:
+            continue
+        key = (config["batch_size"], config["backend"])
+        if key not in best or result["msgs_per_s"] > best[key]["msgs_per_s"]:
+            best[key] = result
+
+    for (batch_size, backend), result in best.items():
+        print(
+            f"Best layout for batch_size={batch_size} backend={backend}: "
+            f"{result['config']['workers']} workers x {result['config']['threads']} threads "
+            f"({result['msgs_per_s']:.1f} msgs/s)"
+        )
+
+
+def _format_config(config):
+    return " ".join(f"{key}={value}" for key, value in config.items() if value is not None)
+
+
+def _csv(cast):
+    return lambda value: [cast(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the classifier pipeline")
+    parser.add_argument("--modes", type=_csv(str), default=list(MODES))
+    parser.add_argument("--batch-sizes", type=_csv(int), default=[8, 32])
+    parser.add_argument("--workers", type=_csv(int), default=[1, 2], help="Pipeline worker processes")
+    parser.add_argument("--backends", type=_csv(str), default=["torch"])
+    parser.add_argument("--threads", type=_csv(int), default=[],
+                        help="Threads per worker with a CPU layout, none leaves them to the libraries")
+    parser.add_argument("--pin", action="store_true", help="Pin the workers of a CPU layout to their own cores")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Run the pipeline mode with every workers x threads split of the CPUs")
+    parser.add_argument("--transport", choices=("list", "stream"), default="list",
+                        help="Input transport of the pipeline mode, stream needs --redis-url")
+    parser.add_argument("--codec", choices=("json", "msgpack"), default="json",
+                        help="Input payload format of the pipeline mode")
+    parser.add_argument("--corpus", choices=("phrases", "synthetic"), default="synthetic")
+    parser.add_argument("--size", type=int, default=512, help="Messages per configuration")
+    parser.add_argument("--min-words", type=int, default=5)
+    parser.add_argument("--max-words", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--phrases", default=DEFAULT_PHRASES)
+    parser.add_argument("--model", default=os.getenv("MODEL_NAME", DEFAULT_MODEL))
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--bucket-size", type=int, default=16)
+    parser.add_argument("--redis-url", help="Scratch Redis database instead of fakeredis")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for a pipeline run")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare throughput with")
+    args = parser.parse_args()
+
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    if args.transport == "stream" and not args.redis_url:
+        # fakeredis runs blocking XREADGROUP calls synchronously, stalling the event loop
+        parser.error("--transport stream needs --redis-url")
+
+    if args.sweep and "pipeline" not in args.modes:
+        parser.error("--sweep needs the pipeline mode")
+
+    from app.processor.topology import cpu_budget
+
+    budget = cpu_budget()
+    texts = build_corpus(args.corpus, args.size, args.phrases, args.min_words, args.max_words, args.seed)
+    results = []
+
+    for config in _configs(args, budget):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as runner:
+            result = runner.submit(run_config, config, texts).result()
+
+        latency = result["batch_latency_s"]
+        print(
+            f"{_format_config(result['config'])}: {result['msgs_per_s']:.1f} msgs/s, "
+            f"p50 {latency['p50'] * 1000:.1f} ms, p95 {latency['p95'] * 1000:.1f} ms, "
+            f"p99 {latency['p99'] * 1000:.1f} ms, peak RSS {result['peak_rss_mb']:.0f} MB",
+            flush=True
+        )
+        results.append(result)
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cpu_budget": budget,
+        "corpus": {
+            "kind": args.corpus,
+            "size": args.size,
+            "min_words": args.min_words,
+            "max_words": args.max_words,
+            "seed": args.seed,
+        },
+        "model": args.model,
+        "results": results,
+    }
+
+    if args.sweep:
+        report_best_layouts(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            compare(results, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main()
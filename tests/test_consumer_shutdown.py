@@ -0,0 +1,145 @@
+"""Cancelling the consumer mid-pipeline must not lose messages
+
+Runs ``BERTClassifier.start_consuming`` against fakeredis with inference
+held in a thread, so batches pile up in every stage, then cancels it.
+
+    pip install -e ".[bench]" pytest
+    python -m pytest tests/test_consumer_shutdown.py
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.processor import classifier as classifier_module  # noqa: E402
+from app.processor.classifier import BERTClassifier  # noqa: E402
+from app.redis import DEFAULT_LANE, STREAM_GROUP, STREAM_PAYLOAD_FIELD, codec  # noqa: E402
+
+MESSAGES = 20
+
+
+@pytest.fixture
+def held_inference(monkeypatch):
+    """Makes inference run in threads and block until the event is set"""
+    release = threading.Event()
+
+    def classify(texts, *args):
+        release.wait()
+        return [{"label": "normal", "score": 1.0} for _ in texts], False, {}, {}
+
+    monkeypatch.setattr(classifier_module, "_classify_batch_task", classify)
+    monkeypatch.setattr(
+        BERTClassifier, "_create_executor", lambda self: ThreadPoolExecutor(self.num_workers)
+    )
+    return release
+
+
+def _consumer(transport):
+    server = fakeredis.FakeServer()
+    consumer = BERTClassifier(
+        num_workers=1, batch_size=2, max_wait_ms=0, poll_timeout=0.1, transport=transport
+    )
+    consumer.redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    consumer.input_client = fakeredis.FakeAsyncRedis(server=server)
+    return consumer
+
+
+def _payloads():
+    return [
+        codec.encode({"id": f"m{index}", "msg": f"texto {index}", "lane": DEFAULT_LANE})
+        for index in range(MESSAGES)
+    ]
+
+
+async def _cancel_mid_pipeline(consumer, release, fetched):
+    task = asyncio.create_task(consumer.start_consuming())
+
+    # Inference holds one batch and the stages fill up behind it, more
+    # messages than they hold keep the fetch stage off a blocking read
+    while not await fetched():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.2)
+
+    # start_consuming handles its own cancellation and returns
+    task.cancel()
+    release.set()
+    await task
+
+
+def test_cancel_returns_list_batches_to_their_lane(held_inference):
+    consumer = _consumer("list")
+    queue = consumer._lane_queues[DEFAULT_LANE]
+    payloads = _payloads()
+
+    async def run():
+        await consumer.input_client.rpush(queue, *payloads)
+
+        async def fetched():
+            return await consumer.input_client.llen(queue) < MESSAGES - 2
+
+        await _cancel_mid_pipeline(consumer, held_inference, fetched)
+        return await consumer.input_client.lrange(queue, 0, -1)
+
+    assert sorted(asyncio.run(run())) == sorted(payloads)
+    assert not consumer._in_flight
+
+
+def test_cancel_during_a_pop_keeps_its_reply():
+    consumer = _consumer("list")
+    queue = consumer._lane_queues[DEFAULT_LANE]
+    brpop = consumer.input_client.brpop
+    popped = asyncio.Event()
+
+    async def slow_brpop(*args, **kwargs):
+        # Redis has removed the message, its reply is still on the way
+        reply = await brpop(*args, **kwargs)
+        popped.set()
+        await asyncio.sleep(0.2)
+        return reply
+
+    consumer.input_client.brpop = slow_brpop
+
+    async def run():
+        task = asyncio.create_task(consumer._fetch_batch())
+        await asyncio.sleep(0.01)
+        await consumer.input_client.rpush(queue, *_payloads()[:1])
+        await popped.wait()
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await consumer.input_client.lrange(queue, 0, -1)
+
+    assert asyncio.run(run()) == _payloads()[:1]
+
+
+def test_cancel_leaves_stream_entries_pending(held_inference):
+    consumer = _consumer("stream")
+    stream = consumer._lane_streams[DEFAULT_LANE]
+
+    async def run():
+        await consumer._ensure_stream_group()
+        added = [
+            await consumer.redis_client.xadd(stream, {STREAM_PAYLOAD_FIELD: payload})
+            for payload in _payloads()
+        ]
+
+        async def fetched():
+            pending = await consumer.redis_client.xpending(stream, STREAM_GROUP)
+            return pending["pending"] > 2
+
+        await _cancel_mid_pipeline(consumer, held_inference, fetched)
+
+        # Every entry is either still pending or not yet delivered
+        pending = await consumer.redis_client.xpending_range(stream, STREAM_GROUP, "-", "+", MESSAGES)
+        unread = await consumer.redis_client.xreadgroup(STREAM_GROUP, "other", {stream: ">"})
+        return added, [entry["message_id"] for entry in pending] + [
+            entry_id for entry_id, _ in (unread[0][1] if unread else [])
+        ]
+
+    added, returned = asyncio.run(run())
+    assert sorted(returned) == sorted(added)
+    assert not consumer._in_flight
@@ -0,0 +1,64 @@
+"""Lane selection of ``POST /api/enqueue/batch``
+
+Runs the API router against fakeredis on the list transport.
+
+    pip install -e ".[bench]" pytest httpx
+    python -m pytest tests/test_enqueue_batch.py
+"""
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+httpx = pytest.importorskip("httpx")
+
+from fastapi import FastAPI  # noqa: E402
+
+from app import routes  # noqa: E402
+from app.redis import DEFAULT_LANE, INPUT_QUEUE, codec, get_async_client, lane_key  # noqa: E402
+from app.utils import Config  # noqa: E402
+
+
+@pytest.fixture
+def lanes(monkeypatch):
+    monkeypatch.setattr(Config, "QUEUE_TRANSPORT", "list")
+    monkeypatch.setattr(routes, "LANES", {"high": 8, DEFAULT_LANE: 1})
+
+
+def _enqueue(items, lane):
+    redis = fakeredis.FakeAsyncRedis()
+    app = FastAPI()
+    app.include_router(routes.api, prefix="/api")
+    app.dependency_overrides[get_async_client] = lambda: redis
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/enqueue/batch", params={"lane": lane}, json=items)
+
+        queued = {
+            name: [codec.decode(payload)["msg"] for payload in await redis.lrange(lane_key(INPUT_QUEUE, name), 0, -1)]
+            for name in (DEFAULT_LANE, "high")
+        }
+        return response, queued
+
+    return asyncio.run(run())
+
+
+def test_null_item_lane_uses_the_batch_lane(lanes):
+    response, queued = _enqueue(
+        [{"msg": "sem faixa"}, {"msg": "faixa nula", "lane": None}, {"msg": "padrão", "lane": DEFAULT_LANE}],
+        lane="high",
+    )
+
+    assert response.status_code == 202
+    assert response.json()["errors"] == []
+    assert queued == {"high": ["sem faixa", "faixa nula"], DEFAULT_LANE: ["padrão"]}
+
+
+def test_invalid_item_lane_is_reported(lanes):
+    response, queued = _enqueue([{"msg": "lista", "lane": ["high"]}, {"msg": "ok"}], lane="high")
+
+    assert response.status_code == 202
+    assert [error["index"] for error in response.json()["errors"]] == [0]
+    assert queued == {"high": ["ok"], DEFAULT_LANE: []}